@@ -1,19 +1,156 @@
+import os
+import json
+import time
+import threading
+
 import requests
 from requests.auth import HTTPBasicAuth
 
+from fileutil import file_lock, write_json
+from log import debug_print
+
 # Correct FIP OAuth token endpoint
-token_url = "https://ews.fip.finra.org/fip/rest/ews/oauth2/access_token?grant_type=client_credentials"
+TOKEN_URL = "https://ews.fip.finra.org/fip/rest/ews/oauth2/access_token?grant_type=client_credentials"
 
 # Your credentials
-client_id = "fake"
-client_secret = "fake"
-
-response = requests.post(token_url, auth=HTTPBasicAuth(client_id, client_secret))
-
-if response.status_code == 200:
-    token_data = response.json()
-    access_token = token_data["access_token"]
-    print("✅ Access Token:", access_token)
-else:
-    print("❌ Failed to get token")
-    print(response.status_code, response.text)
+CLIENT_ID = os.environ.get("FIP_CLIENT_ID", "fake")
+CLIENT_SECRET = os.environ.get("FIP_CLIENT_SECRET", "fake")
+
+CACHE_PATH = os.environ.get(
+    "FIP_TOKEN_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "finra", "fip_token.json")
+)
+
+
+class TokenError(Exception):
+    pass
+
+
+class TokenProvider:
+    """Caches the FIP access token and refreshes it ahead of expiry.
+
+    Threads share one in-memory token and a single refresh at a time. Processes
+    share it through a locked on-disk cache, so a pool of workers costs one
+    token round-trip rather than one per worker.
+    """
+
+    def __init__(self, client_id=CLIENT_ID, client_secret=CLIENT_SECRET, token_url=TOKEN_URL,
+                 cache_path=CACHE_PATH, refresh_margin=60, timeout=15, session=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.lock = threading.Lock()
+        self.token = None
+        self.expires_at = 0
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def _fresh(self, expires_at):
+        return expires_at - self.refresh_margin > time.time()
+
+    def get_token(self):
+        """A valid access token, fetching one only if nobody else has a fresh one"""
+        if self.token and self._fresh(self.expires_at):
+            return self.token
+        with self.lock:
+            # Another thread may have refreshed while we waited
+            if self.token and self._fresh(self.expires_at):
+                return self.token
+            self._refresh()
+            return self.token
+
+    def auth_header(self):
+        return {"Authorization": f"Bearer {self.get_token()}"}
+
+    def invalidate(self, rejected_token=None):
+        """Drop the cached token after the server rejected it (a 401).
+
+        Pass the token that was actually sent: if another thread or process has
+        already replaced it, the newer token is kept rather than thrown away.
+        """
+        with self.lock:
+            if rejected_token is not None and self.token not in (None, rejected_token):
+                return
+            self.token, self.expires_at = None, 0
+            with file_lock(self.cache_path):
+                cache = self._read_cache()
+                entry = cache.get(self.client_id)
+                if entry and (rejected_token is None or entry["access_token"] == rejected_token):
+                    del cache[self.client_id]
+                    self._write_cache(cache)
+
+    def _refresh(self, min_ttl=None):
+        with file_lock(self.cache_path):
+            # Another process may already have a fresh token on disk
+            entry = self._read_cache().get(self.client_id)
+            if entry and entry["expires_at"] - (min_ttl or self.refresh_margin) > time.time():
+                self.token, self.expires_at = entry["access_token"], entry["expires_at"]
+                return
+            token, expires_at = self._fetch()
+            cache = self._read_cache()
+            cache[self.client_id] = {"access_token": token, "expires_at": expires_at}
+            self._write_cache(cache)
+            self.token, self.expires_at = token, expires_at
+
+    def _fetch(self):
+        response = self.session.post(self.token_url, auth=HTTPBasicAuth(self.client_id, self.client_secret),
+                                     timeout=self.timeout)
+        if response.status_code != 200:
+            raise TokenError(f"Failed to get token: {response.status_code} {response.text[:200]}")
+        token_data = response.json()
+        expires_in = int(token_data.get("expires_in", 1800))
+        return token_data["access_token"], time.time() + expires_in
+
+    # ---------- on-disk cache ----------
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, cache):
+        # The token is a credential: keep the file private
+        write_json(self.cache_path, cache, mode=0o600)
+
+    # ---------- background refresh ----------
+
+    def start(self):
+        """Refresh the token in a background thread shortly before it expires"""
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._refresher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        # Wake up a second margin early, so callers never block on a refresh themselves
+        while True:
+            try:
+                self.get_token()
+                wait = max(1, self.expires_at - 2 * self.refresh_margin - time.time())
+            except Exception as e:
+                debug_print(f"❌ Background token refresh failed: {e}", "ERROR")
+                wait = 10
+            if self._stop.wait(wait):
+                return
+            with self.lock:
+                try:
+                    self._refresh(min_ttl=2 * self.refresh_margin)
+                except Exception as e:
+                    debug_print(f"❌ Background token refresh failed: {e}", "ERROR")
+
+
+if __name__ == "__main__":
+    try:
+        access_token = TokenProvider().get_token()
+        debug_print(f"✅ Access Token: {access_token}", "SUCCESS")
+    except TokenError as e:
+        debug_print(f"❌ {e}", "ERROR")
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+from fake_site import FakeBrokerCheck
+
+
+STAGES = (
+    "start_browser",
+    "open_search_form",
+    "return_to_search_form",
+    "search_firm",
+    "click_first_result",
+    "click_detailed_report_and_download",
+    "firm_total",
+    "http_lookup",
+)
+
+
+class StageTimer:
+    """Collects (seconds, ok) samples per pipeline stage"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, stage, func, *args, check=bool, **kwargs):
+        start = time.perf_counter()
+        try:
+            value = func(*args, **kwargs)
+        except Exception as e:
+            print(f"[bench] {stage} raised {type(e).__name__}: {e}")
+            value = None
+        self.add(stage, time.perf_counter() - start, value is not None and check(value))
+        return value
+
+    def add(self, stage, seconds, ok=True):
+        self.samples.setdefault(stage, []).append((seconds, ok))
+
+    def summary(self):
+        rows = []
+        for stage in sorted(self.samples, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            seconds = sorted(s for s, _ in self.samples[stage])
+            rows.append({
+                "stage": stage,
+                "n": len(seconds),
+                "failed": sum(1 for _, ok in self.samples[stage] if not ok),
+                "min": seconds[0],
+                "median": statistics.median(seconds),
+                "p90": seconds[min(len(seconds) - 1, int(len(seconds) * 0.9))],
+                "mean": statistics.fmean(seconds),
+                "max": seconds[-1],
+            })
+        return rows
+
+
+def print_summary(rows):
+    print(f"\n{'stage':<38}{'n':>4}{'fail':>6}{'min':>9}{'median':>9}{'p90':>9}{'mean':>9}{'max':>9}")
+    for r in rows:
+        print(f"{r['stage']:<38}{r['n']:>4}{r['failed']:>6}"
+              + "".join(f"{r[k]:>9.3f}" for k in ("min", "median", "p90", "mean", "max")))
+
+
+def point_at(site, workdir):
+    """Send every URL and every state file of the pipeline to the fake site / a scratch dir"""
+    os.environ.update({
+        "FINRA_BROKERCHECK_URL": site.url + "/",
+        "FINRA_API_BASE_URL": site.url,
+        "FINRA_REPORT_BASE_URL": site.url,
+        "FINRA_SESSION_STATE": os.path.join(workdir, "session_state.json"),
+        "FINRA_LOCATOR_STATS": os.path.join(workdir, "locator_stats.json"),
+        "FINRA_FIRM_STORE": os.path.join(workdir, "firms.sqlite"),
+        "FINRA_REPORT_STORE": os.path.join(workdir, "report_store"),
+        "FINRA_DEBUG_DIR": os.path.join(workdir, "debug"),
+    })
+
+
+def bench_browser(timer, firms, runs, workdir, headless=True, profile="lean", capture_network=False):
+    # Imported here so the module-level URLs pick up point_at()'s environment
+    from bot2 import (start_browser, open_search_form, return_to_search_form, search_firm,
+                      click_first_result, click_detailed_report_and_download, crd_from_url)
+
+    for run in range(runs):
+        download_dir = os.path.join(workdir, f"downloads-{run}")
+        started = timer.time("start_browser", start_browser, download_dir=download_dir, headless=headless,
+                             profile=profile, capture_network=capture_network)
+        if not started:
+            continue
+        driver, wait = started
+        try:
+            form_ready = timer.time("open_search_form", open_search_form, driver, wait)
+            for i, firm in enumerate(firms):
+                if i > 0:
+                    form_ready = timer.time("return_to_search_form", return_to_search_form, driver, wait)
+                if not form_ready:
+                    break
+                start = time.perf_counter()
+                found = timer.time("search_firm", search_firm, driver, wait, firm)
+                # Network-capture mode hands back records; time the same click path either way
+                ok = bool(found) and timer.time("click_first_result", click_first_result, driver, wait, firm)
+                ok = ok and timer.time("click_detailed_report_and_download", click_detailed_report_and_download,
+                                       driver, wait, crd_from_url(driver.current_url))
+                timer.add("firm_total", time.perf_counter() - start, bool(ok))
+        finally:
+            driver.quit()
+
+
+def bench_http(timer, firms, runs, workdir):
+    from http_client import BrokerCheckClient
+    from firm_store import FirmStore
+
+    # ttl=0: every lookup goes over the wire
+    store = FirmStore(os.path.join(workdir, "http_firms.sqlite"), ttl=0)
+    with BrokerCheckClient(download_dir=os.path.join(workdir, "http_downloads"), store=store) as client:
+        for _ in range(runs):
+            for firm in firms:
+                timer.time("http_lookup", client.lookup, firm, check=lambda r: r["status"] == "downloaded")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each pipeline stage against a local fake BrokerCheck")
+    parser.add_argument("firms", nargs="*", default=["Goldman Sachs", "149777", "Morgan Stanley"])
+    parser.add_argument("--runs", type=int, default=3, help="fresh browser sessions to time")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--api-latency", type=float, default=None)
+    parser.add_argument("--pdf-latency", type=float, default=None)
+    parser.add_argument("--profile", default="lean", choices=["default", "lean"])
+    parser.add_argument("--headed", action="store_true", help="show the browser")
+    parser.add_argument("--network", action="store_true", help="read search results from the API responses")
+    parser.add_argument("--http", action="store_true", help="also time BrokerCheckClient lookups")
+    parser.add_argument("--http-only", action="store_true", help="skip the browser stages")
+    parser.add_argument("--json", help="write the summary to this file")
+    parser.add_argument("--trace", help="write the run's spans here in Chrome trace-event format")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory(prefix="finra-bench-") as workdir, \
+            FakeBrokerCheck(latency=args.latency, api_latency=args.api_latency, pdf_latency=args.pdf_latency) as site:
+        point_at(site, workdir)
+        print(f"[bench] fake site on {site.url}, scratch dir {workdir}")
+        if not args.http_only:
+            bench_browser(timer, args.firms, args.runs, workdir, headless=not args.headed,
+                          profile=args.profile, capture_network=args.network)
+        if args.http or args.http_only:
+            bench_http(timer, args.firms, args.runs, workdir)
+        requests_served = dict(site.hits)
+        if args.trace and not args.http_only:
+            from tracing import take_spans, export_chrome_trace
+            export_chrome_trace(args.trace, take_spans())
+
+    rows = timer.summary()
+    print_summary(rows)
+    print(f"\nrequests served: {requests_served}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "stages": rows, "requests": requests_served}, f, indent=2)
+    sys.exit(1 if any(r["failed"] for r in rows) else 0)
@@ -1,4 +1,8 @@
+import os
+import re
+import sys
 import time
+from urllib.parse import urlparse
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -8,145 +12,123 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, JavascriptException, ElementClickInterceptedException
-from webdriver_manager.chrome import ChromeDriverManager
+from waits import (
+    reset_wait_log, wait_until, total_wait_time, install_request_tracker, document_ready, angular_stable, page_settled,
+    element_visible_and_stable, new_window_handle, url_changed, any_element_present,
+    element_gone
+)
+from downloader import report_url
+from locators import LOCATORS
+from dom import dom_snapshot, wait_for_any
+from diagnostics import capture, start_job, finish_job, new_job_id
+from profiles import PROFILES, DEFAULT_WINDOW_SIZE, apply_lean_options, block_nonessential
+from driver_resolver import resolve_chromedriver
+from session_state import restore_session_state, capture_session_state
+from network_capture import enable_network_capture, drain_performance_log, wait_for_search_response
+from firm_store import FirmStore
+from download_manager import DownloadManager
+from report_store import archive_report
+from tracing import traced, annotate, start_span, span, flush as flush_spans
+from log import debug_print
 
+# Point at a local stand-in (fake_site.py) to run offline
+HOME_URL = os.environ.get("FINRA_BROKERCHECK_URL", "https://brokercheck.finra.org/")
 
-def debug_print(msg, level="INFO"):
-    """Print with timestamp for debugging"""
-    timestamp = time.strftime("%H:%M:%S")
-    print(f"[{timestamp}] [{level}] {msg}")
+COOKIE_SELECTORS = [
+    (By.XPATH, "//button[contains(text(),'Continue')]"),
+    (By.XPATH, "//button[contains(text(),'continue')]"),
+    (By.XPATH, "//button[contains(@class,'cookie')]"),
+    (By.XPATH, "//button[contains(text(),'Accept')]"),
+    (By.XPATH, "//button[contains(text(),'Customize')]")
+]
 
 
 def inspect_firm_section(driver, wait):
     """Inspect what's visible after clicking Firm tab"""
     debug_print("\n--- INSPECTING FIRM SECTION ---", "INFO")
     
-    # Check what's visible in the DOM
+    # Check what's visible in the DOM - one round-trip for all the checks below
     try:
-        # Look for any input fields
-        all_inputs = driver.find_elements(By.TAG_NAME, "input")
-        debug_print(f"Total input fields found: {len(all_inputs)}", "DEBUG")
+        snapshot = dom_snapshot(driver, {
+            # Look for any input fields
+            "inputs": {"css": "input"},
+            # Look specifically for firm-related inputs
+            "firm_inputs": {"xpath": "//input[contains(@aria-label, 'firm') or contains(@placeholder, 'Firm') or contains(@formcontrolname, 'firm')]"},
+            # Check if Individual tab is still active
+            "individual_active": {"xpath": "//li[contains(@class, 'active') or contains(@class, 'selected')]//div[contains(text(), 'Individual')]"},
+            # Check for any error messages or loading indicators
+            "loading": {"xpath": "//*[contains(@class, 'loading') or contains(@class, 'spinner')]"},
+        })
         
-        for i, input_elem in enumerate(all_inputs):
-            input_id = input_elem.get_attribute("id")
-            input_name = input_elem.get_attribute("name")
-            input_placeholder = input_elem.get_attribute("placeholder")
-            input_class = input_elem.get_attribute("class")
-            is_displayed = input_elem.is_displayed()
-            debug_print(f"Input {i+1}: id='{input_id}', name='{input_name}', placeholder='{input_placeholder}', displayed={is_displayed}", "DEBUG")
+        debug_print(f"Total input fields found: {len(snapshot['inputs'])}", "DEBUG")
+        for i, elem in enumerate(snapshot["inputs"]):
+            attrs = elem["attrs"]
+            debug_print(f"Input {i+1}: id='{attrs['id']}', name='{attrs['name']}', placeholder='{attrs['placeholder']}', displayed={elem['visible']}", "DEBUG")
         
-        # Look specifically for firm-related inputs
-        firm_inputs = driver.find_elements(By.XPATH, "//input[contains(@aria-label, 'firm') or contains(@placeholder, 'Firm') or contains(@formcontrolname, 'firm')]")
-        debug_print(f"Firm-related inputs found: {len(firm_inputs)}", "DEBUG")
+        debug_print(f"Firm-related inputs found: {len(snapshot['firm_inputs'])}", "DEBUG")
         
-        # Check if Individual tab is still active
-        active_tab = driver.find_elements(By.XPATH, "//li[contains(@class, 'active') or contains(@class, 'selected')]//div[contains(text(), 'Individual')]")
-        if active_tab:
+        if snapshot["individual_active"]:
             debug_print("⚠️ Individual tab still appears active!", "WARNING")
         else:
             debug_print("✅ Individual tab not active - good", "DEBUG")
         
-        # Check for any error messages or loading indicators
-        loading = driver.find_elements(By.XPATH, "//*[contains(@class, 'loading') or contains(@class, 'spinner')]")
-        if loading:
-            debug_print(f"Loading elements found: {len(loading)}", "DEBUG")
+        if snapshot["loading"]:
+            debug_print(f"Loading elements found: {len(snapshot['loading'])}", "DEBUG")
         
     except Exception as e:
         debug_print(f"Error during inspection: {e}", "ERROR")
     
     # Take screenshot
-    driver.save_screenshot("debug_firm_section.png")
-    debug_print("Screenshot saved as debug_firm_section.png", "INFO")
+    capture(driver, "firm_section")
 
 
-def force_input_update(driver, input_element, value):
-    """Force the input to update using multiple methods"""
-    debug_print("\n--- FORCING INPUT UPDATE ---", "INFO")
-    
-    # Method 1: Clear and send_keys with events
-    debug_print("Method 1: Clear and send_keys with events", "DEBUG")
+def _set_with_send_keys(driver, input_element, value):
+    """Clear and send_keys with events"""
     input_element.clear()
     input_element.send_keys(value)
-    
-    # Trigger events
     driver.execute_script("""
         arguments[0].dispatchEvent(new Event('input', { bubbles: true }));
         arguments[0].dispatchEvent(new Event('change', { bubbles: true }));
         arguments[0].dispatchEvent(new Event('blur', { bubbles: true }));
     """, input_element)
-    
-    time.sleep(0.5)
-    
-    # Check if it worked
-    current = driver.execute_script("return arguments[0].value;", input_element)
-    if current == value:
-        debug_print("✅ Method 1 succeeded", "SUCCESS")
-        return True
-    
-    # Method 2: JavaScript set + events
-    debug_print("Method 2: JavaScript set + events", "DEBUG")
+
+
+def _set_with_javascript(driver, input_element, value):
+    """JavaScript set + events"""
     driver.execute_script("""
         arguments[0].value = arguments[1];
         arguments[0].dispatchEvent(new Event('input', { bubbles: true }));
         arguments[0].dispatchEvent(new Event('change', { bubbles: true }));
         arguments[0].dispatchEvent(new Event('blur', { bubbles: true }));
     """, input_element, value)
-    
-    time.sleep(0.5)
-    
-    current = driver.execute_script("return arguments[0].value;", input_element)
-    if current == value:
-        debug_print("✅ Method 2 succeeded", "SUCCESS")
-        return True
-    
-    # Method 3: Character by character with events
-    debug_print("Method 3: Character by character", "DEBUG")
+
+
+def _set_char_by_char(driver, input_element, value):
+    """Character by character with events"""
     input_element.clear()
     for char in value:
         input_element.send_keys(char)
         driver.execute_script("arguments[0].dispatchEvent(new Event('input', { bubbles: true }));", input_element)
-        time.sleep(0.05)
-    
-    driver.execute_script("arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", input_element)
-    driver.execute_script("arguments[0].dispatchEvent(new Event('blur', { bubbles: true }));", input_element)
-    
-    time.sleep(0.5)
-    
-    current = driver.execute_script("return arguments[0].value;", input_element)
-    if current == value:
-        debug_print("✅ Method 3 succeeded", "SUCCESS")
-        return True
-    
-    # Method 4: ActionChains simulation
-    debug_print("Method 4: ActionChains simulation", "DEBUG")
-    actions = ActionChains(driver)
-    actions.move_to_element(input_element).click().perform()
-    time.sleep(0.2)
+    driver.execute_script("""
+        arguments[0].dispatchEvent(new Event('change', { bubbles: true }));
+        arguments[0].dispatchEvent(new Event('blur', { bubbles: true }));
+    """, input_element)
+
+
+def _set_with_action_chains(driver, input_element, value):
+    """ActionChains simulation"""
+    ActionChains(driver).move_to_element(input_element).click().perform()
     
     # Select all and delete
     input_element.send_keys(Keys.CONTROL + 'a')
     input_element.send_keys(Keys.DELETE)
-    time.sleep(0.2)
-    
-    # Type slowly
-    for char in value:
-        actions = ActionChains(driver)
-        actions.send_keys(char).perform()
-        time.sleep(0.05)
     
-    # Press Tab to trigger blur
-    actions = ActionChains(driver)
-    actions.send_keys(Keys.TAB).perform()
-    
-    time.sleep(0.5)
-    
-    current = driver.execute_script("return arguments[0].value;", input_element)
-    if current == value:
-        debug_print("✅ Method 4 succeeded", "SUCCESS")
-        return True
-    
-    # Method 5: Direct DOM manipulation with multiple events
-    debug_print("Method 5: Direct DOM manipulation", "DEBUG")
+    # Type the value and press Tab to trigger blur, in one round-trip
+    ActionChains(driver).send_keys(value).send_keys(Keys.TAB).perform()
+
+
+def _set_with_dom_events(driver, input_element, value):
+    """Direct DOM manipulation with multiple events"""
     driver.execute_script("""
         var input = arguments[0];
         var value = arguments[1];
@@ -172,35 +154,104 @@ def force_input_update(driver, input_element, value):
             input.dispatchEvent(event);
         });
     """, input_element, value)
+
+
+INPUT_METHODS = {
+    "send_keys": _set_with_send_keys,
+    "javascript": _set_with_javascript,
+    "char_by_char": _set_char_by_char,
+    "action_chains": _set_with_action_chains,
+    "dom_events": _set_with_dom_events,
+}
+
+
+def input_accepted(input_element, value):
+    """The input shows the value and, on Angular forms, the control has left its pristine state"""
+    def condition(driver):
+        return driver.execute_script("""
+            var el = arguments[0];
+            return el.value === arguments[1] && !el.classList.contains('ng-pristine');
+        """, input_element, value)
+    
+    condition.__name__ = "input_accepted"
+    return condition
+
+
+@traced("input")
+def force_input_update(driver, input_element, value):
+    """Set the input with the fastest method that reliably works on this page.
+
+    Each method is timed and its success is recorded per page, so the
+    ordering adapts across runs instead of always escalating 1 -> 5.
+    """
+    debug_print("\n--- FORCING INPUT UPDATE ---", "INFO")
+    page = urlparse(driver.current_url)
+    stats_key = f"input_method:{page.netloc}{page.path}"
     
-    time.sleep(0.5)
-    
-    current = driver.execute_script("return arguments[0].value;", input_element)
-    if current == value:
-        debug_print("✅ Method 5 succeeded", "SUCCESS")
-        return True
+    for name in LOCATORS.fastest_first(stats_key, list(INPUT_METHODS)):
+        debug_print(f"Input method: {name}", "DEBUG")
+        start = time.perf_counter()
+        try:
+            INPUT_METHODS[name](driver, input_element, value)
+            ok = wait_until(driver, input_accepted(input_element, value), timeout=0.5,
+                            label=f"input value ({name})", poll=0.05)
+        except Exception as e:
+            debug_print(f"❌ {name} raised: {e}", "DEBUG")
+            ok = False
+        LOCATORS.record(stats_key, name, bool(ok), seconds=time.perf_counter() - start)
+        if ok:
+            debug_print(f"✅ {name} succeeded", "SUCCESS")
+            annotate(method=name)
+            return True
     
     debug_print("❌ All methods failed to set value", "ERROR")
     return False
 
 
-def click_first_result(driver, wait):
-    """Click on the first search result (Goldman Sachs & Co. LLC)"""
+def xpath_literal(text):
+    """Quote text for use inside an XPath expression, even if it contains quotes"""
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    parts = text.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in parts) + ")"
+
+
+@traced("result_click")
+def click_first_result(driver, wait, firm=None):
+    """Click on the first search result (Goldman Sachs & Co. LLC by default)"""
     debug_print("\n--- CLICKING ON FIRST SEARCH RESULT ---", "INFO")
     
     # Take screenshot before clicking
-    driver.save_screenshot("debug_before_click.png")
-    debug_print("Screenshot saved before clicking result", "INFO")
+    capture(driver, "before_click")
+    
+    # Result cards show the firm name in upper case; a CRD search has no name to match on
+    name = (firm or "Goldman Sachs").strip().upper()
+    name_literal = None if name.isdigit() else xpath_literal(name)
     
     # Multiple strategies to find the first result
     result_selectors = [
         # Based on the HTML you provided - looking for the big name element
         (By.CSS_SELECTOR, "investor-tools-big-name"),
-        (By.XPATH, "//investor-tools-big-name[contains(., 'GOLDMAN SACHS')]"),
-        (By.XPATH, "//span[contains(text(), 'GOLDMAN SACHS & CO. LLC')]"),
+    ]
+    if name_literal:
+        result_selectors += [
+            # Built per firm, so counted under a fixed key instead of one entry per name
+            (By.XPATH, f"//investor-tools-big-name[contains(., {name_literal})]",
+             "xpath=//investor-tools-big-name[contains(., <name>)]"),
+            (By.XPATH, f"//span[contains(text(), {name_literal})]", "xpath=//span[contains(text(), <name>)]"),
+        ]
+    result_selectors += [
         (By.XPATH, "//div[contains(@class, 'border-primary-60') and contains(@class, 'bg-primary-0')]"),
         (By.CSS_SELECTOR, "div[class*='border-primary-60'][class*='bg-primary-0']"),
-        (By.XPATH, "//div[contains(@class, 'flex-col') and .//span[contains(text(), 'GOLDMAN SACHS')]]"),
+    ]
+    if name_literal:
+        result_selectors.append(
+            (By.XPATH, f"//div[contains(@class, 'flex-col') and .//span[contains(text(), {name_literal})]]",
+             "xpath=//div[contains(@class, 'flex-col') and .//span[contains(text(), <name>)]]")
+        )
+    result_selectors += [
         # More general selectors
         (By.CSS_SELECTOR, ".search-results .result-item:first-child"),
         (By.CSS_SELECTOR, ".firm-result:first-child"),
@@ -208,47 +259,37 @@ def click_first_result(driver, wait):
         (By.XPATH, "//div[contains(@class, 'flex-col') and contains(@class, 'border-t-4')][1]")
     ]
     
-    result_element = None
-    
-    for by, selector in result_selectors:
-        try:
-            debug_print(f"Trying to find result with: {selector}", "DEBUG")
-            elements = driver.find_elements(by, selector)
-            if elements:
-                # Try to find the first visible and clickable element
-                for elem in elements:
-                    if elem.is_displayed():
-                        # Check if this element or its parent is clickable
-                        result_element = elem
-                        debug_print(f"✅ Found visible element with: {selector}", "SUCCESS")
-                        break
-                if result_element:
-                    break
-        except Exception as e:
-            debug_print(f"Error with {selector}: {e}", "DEBUG")
-            continue
+    result_element, matched = LOCATORS.find(driver, "first_result", result_selectors,
+                                            log=lambda m: debug_print(m, "DEBUG"))
+    if result_element:
+        debug_print(f"✅ Found visible element with: {matched[1]}", "SUCCESS")
+        annotate(selector=matched[1])
     
     if not result_element:
         debug_print("❌ Could not find any result element!", "ERROR")
-        # Fallback: Try to find any element containing "GOLDMAN SACHS"
+        if not name_literal:
+            return False
+        # Fallback: Try to find any element containing the firm name
         try:
-            debug_print("Fallback: Looking for any element with 'GOLDMAN SACHS' text", "INFO")
+            debug_print(f"Fallback: Looking for any element with '{name}' text", "INFO")
             result_element = wait.until(
-                EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'GOLDMAN SACHS')]"))
+                EC.presence_of_element_located((By.XPATH, f"//*[contains(text(), {name_literal})]"))
             )
-            debug_print("✅ Found element with 'GOLDMAN SACHS' text", "SUCCESS")
+            debug_print(f"✅ Found element with '{name}' text", "SUCCESS")
+            annotate(selector=f"text:{name}")
         except:
-            debug_print("❌ Could not find any element with 'GOLDMAN SACHS'", "ERROR")
+            debug_print(f"❌ Could not find any element with '{name}'", "ERROR")
             return False
     
     # Scroll the element into view
     debug_print("Scrolling result into view", "DEBUG")
-    driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", result_element)
-    time.sleep(2)
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'instant'});", result_element)
+    wait_until(driver, element_visible_and_stable(result_element), timeout=5, label="result visible")
     
     # Highlight the element for debugging
     driver.execute_script("arguments[0].style.border='5px solid red'; arguments[0].style.backgroundColor='yellow';", result_element)
-    time.sleep(1)
+    
+    url_before = driver.current_url
     
     # Try multiple click methods
     click_success = False
@@ -264,6 +305,7 @@ def click_first_result(driver, wait):
             debug_print(f"Trying click method: {method_name}", "DEBUG")
             method_func()
             debug_print(f"✅ {method_name} succeeded", "SUCCESS")
+            annotate(method=method_name)
             click_success = True
             break
         except Exception as e:
@@ -277,97 +319,100 @@ def click_first_result(driver, wait):
     
     # Wait for the next page to load
     debug_print("Waiting for next page to load...", "INFO")
-    time.sleep(5)
+    wait_until(driver, url_changed(url_before), timeout=10, label="detail page URL")
     
     # Check if URL changed
     current_url = driver.current_url
     debug_print(f"Current URL after click: {current_url}", "INFO")
     
+    wait_for_detail_page(driver)
+    return True
+
+
+@traced("detail_page")
+def wait_for_detail_page(driver):
+    """Wait until the firm detail page has rendered"""
     # Wait for new content to appear
-    try:
-        # Look for elements that indicate we're on the firm detail page
-        detail_indicators = [
-            "investor-tools-firm-detail",
-            ".firm-detail",
-            "[data-testid='firm-detail']",
-            "//div[contains(text(), 'Firm Profile')]",
-            "//div[contains(text(), 'Registration')]"
-        ]
-        
-        for indicator in detail_indicators:
-            try:
-                if indicator.startswith("//"):
-                    wait.until(EC.presence_of_element_located((By.XPATH, indicator)))
-                else:
-                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, indicator)))
-                debug_print(f"✅ Found detail page indicator: {indicator}", "SUCCESS")
-                break
-            except:
-                continue
-    except Exception as e:
-        debug_print(f"Timeout waiting for detail page: {e}", "WARNING")
+    # Look for elements that indicate we're on the firm detail page
+    detail_indicators = [
+        (By.CSS_SELECTOR, "investor-tools-firm-detail"),
+        (By.CSS_SELECTOR, ".firm-detail"),
+        (By.CSS_SELECTOR, "[data-testid='firm-detail']"),
+        (By.XPATH, "//div[contains(text(), 'Firm Profile')]"),
+        (By.XPATH, "//div[contains(text(), 'Registration')]"),
+        (By.XPATH, "//*[contains(text(), 'Detailed Report')]")
+    ]
     
-    # Take screenshot of the detail page
-    driver.save_screenshot("debug_firm_detail_page.png")
-    debug_print("Screenshot saved of firm detail page", "INFO")
+    found = wait_until(driver, any_element_present(detail_indicators), timeout=30, label="detail page indicator")
+    if found:
+        debug_print(f"✅ Found detail page indicator: {found[0]}", "SUCCESS")
+        annotate(selector=found[0])
+    else:
+        debug_print("Timeout waiting for detail page", "WARNING")
+    wait_until(driver, page_settled, timeout=10, label="detail page settled")
     
-    return True
+    # Take screenshot of the detail page
+    capture(driver, "firm_detail_page")
+    return bool(found)
+
+
+def detail_url(crd):
+    return f"{HOME_URL.rstrip('/')}/firm/summary/{crd}"
+
 
+def crd_from_url(url):
+    """Pull the firm CRD out of a detail page (/firm/summary/361) or report (firm_361.pdf) URL"""
+    match = re.search(r"/firm/summary/(\d+)|firm_(\d+)\.pdf", url or "")
+    if not match:
+        return None
+    return match.group(1) or match.group(2)
 
-def click_detailed_report_and_download(driver, wait):
-    """Click on Detailed Report button, handle new tab, and download the PDF"""
+
+def click_detailed_report_and_download(driver, wait, crd=None):
+    """Click on Detailed Report button, handle new tab, and download the PDF.
+
+    Returns {"path", "size", "elapsed"} once the file is complete in the session's
+    download directory, or a falsy value if the download never finished.
+    """
     debug_print("\n--- CLICKING DETAILED REPORT BUTTON ---", "INFO")
+    tab_span = start_span("report_tab")
     
     # Store the current window handle (main tab)
     main_window = driver.current_window_handle
     debug_print(f"Main window handle: {main_window}", "DEBUG")
     
     # Take screenshot before clicking
-    driver.save_screenshot("debug_before_detailed_report.png")
-    debug_print("Screenshot saved before clicking Detailed Report", "INFO")
+    capture(driver, "before_detailed_report")
     
     # Find the Detailed Report button
-    detailed_report_button = None
     report_selectors = [
         (By.XPATH, "//span[contains(text(), 'Detailed Report')]"),
         (By.XPATH, "//button[contains(., 'Detailed Report')]"),
-        (By.CSS_SELECTOR, "span:contains('Detailed Report')"),
         (By.XPATH, "//*[contains(text(), 'Detailed Report')]")
     ]
     
-    for by, selector in report_selectors:
-        try:
-            debug_print(f"Trying to find Detailed Report with: {selector}", "DEBUG")
-            if by == By.CSS_SELECTOR and ":contains" in selector:
-                # Selenium doesn't support :contains, skip
-                continue
-            elements = driver.find_elements(by, selector)
-            if elements:
-                for elem in elements:
-                    if elem.is_displayed():
-                        detailed_report_button = elem
-                        debug_print(f"✅ Found Detailed Report button with: {selector}", "SUCCESS")
-                        break
-                if detailed_report_button:
-                    break
-        except Exception as e:
-            debug_print(f"Error with {selector}: {e}", "DEBUG")
-            continue
+    detailed_report_button, matched = LOCATORS.find(driver, "detailed_report", report_selectors,
+                                                    log=lambda m: debug_print(m, "DEBUG"))
+    if detailed_report_button:
+        debug_print(f"✅ Found Detailed Report button with: {matched[1]}", "SUCCESS")
+        tab_span.set(selector=matched[1])
     
     if not detailed_report_button:
         debug_print("❌ Could not find Detailed Report button!", "ERROR")
+        tab_span.end("failed")
         return False
     
     # Scroll into view
-    driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", detailed_report_button)
-    time.sleep(2)
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'instant'});", detailed_report_button)
+    wait_until(driver, element_visible_and_stable(detailed_report_button), timeout=5, label="Detailed Report visible")
     
     # Highlight the button
     driver.execute_script("arguments[0].style.border='5px solid green'; arguments[0].style.backgroundColor='lightgreen';", detailed_report_button)
-    time.sleep(1)
     
     # Get initial window handles count
     initial_handles = driver.window_handles
+    # The report tab itself may already start the download
+    downloads_before = driver.downloads.mark()
     debug_print(f"Initial window handles: {len(initial_handles)}", "DEBUG")
     
     # Click the button (this should open a new tab)
@@ -383,6 +428,7 @@ def click_detailed_report_and_download(driver, wait):
             debug_print(f"Trying click method: {method_name}", "DEBUG")
             method_func()
             debug_print(f"✅ {method_name} succeeded", "SUCCESS")
+            tab_span.set(method=method_name)
             click_success = True
             break
         except Exception as e:
@@ -390,67 +436,69 @@ def click_detailed_report_and_download(driver, wait):
     
     if not click_success:
         debug_print("❌ All click methods failed for Detailed Report button!", "ERROR")
+        tab_span.end("failed")
         return False
     
     debug_print("✅ Detailed Report button clicked", "SUCCESS")
     
     # Wait for new tab to open
     debug_print("Waiting for new tab to open...", "INFO")
-    time.sleep(5)
-    
-    # Get new window handles
-    new_handles = driver.window_handles
-    debug_print(f"New window handles: {len(new_handles)}", "DEBUG")
-    
-    # Find the new tab (the one that's not the main window)
-    new_tab = None
-    for handle in new_handles:
-        if handle != main_window:
-            new_tab = handle
-            break
+    new_tab = wait_until(driver, new_window_handle(initial_handles), timeout=10, label="report tab")
+    debug_print(f"New window handles: {len(driver.window_handles)}", "DEBUG")
     
     if not new_tab:
         debug_print("❌ No new tab opened!", "ERROR")
+        tab_span.end("failed")
         return False
     
     # Switch to the new tab
     debug_print(f"Switching to new tab: {new_tab}", "INFO")
     driver.switch_to.window(new_tab)
-    time.sleep(3)
+    wait_until(driver, document_ready, timeout=10, label="report tab loaded")
+    tab_span.end("ok")
     
     # Take screenshot of the PDF viewer
-    driver.save_screenshot("debug_pdf_viewer.png")
-    debug_print("Screenshot saved of PDF viewer", "INFO")
-    
-    # Now we're in the PDF viewer tab - click the download button
-    debug_print("\n--- CLICKING DOWNLOAD BUTTON IN PDF VIEWER ---", "INFO")
-    
-    # Wait for PDF viewer to load
-    time.sleep(3)
+    capture(driver, "pdf_viewer", dom=False)
     
     # Try multiple strategies to find and click the download button
     download_clicked = False
+    download_span = start_span("download")
+    
+    # With always_open_pdf_externally Chrome downloads the report instead of showing it;
+    # a second download from the strategies below would only race the first one
+    if wait_until(driver, lambda d: d.downloads.started(downloads_before), timeout=2, label="report download started"):
+        debug_print("✅ Report is already downloading, no viewer to click through", "SUCCESS")
+        download_clicked = True
+        download_span.set(method="opened externally")
+    else:
+        # Now we're in the PDF viewer tab - click the download button
+        debug_print("\n--- CLICKING DOWNLOAD BUTTON IN PDF VIEWER ---", "INFO")
     
     # Strategy 1: Look for download controls element
-    try:
-        debug_print("Strategy 1: Looking for viewer-download-controls", "DEBUG")
-        download_controls = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "viewer-download-controls"))
-        )
-        if download_controls:
-            debug_print("✅ Found viewer-download-controls", "SUCCESS")
-            # Click on the download controls (this might open the download dropdown)
-            driver.execute_script("arguments[0].click();", download_controls)
-            time.sleep(2)
-            
-            # Look for the actual download button in the dropdown
-            download_button = driver.find_element(By.CSS_SELECTOR, "cr-icon-button[iron-icon='pdf:file-download']")
-            if download_button:
-                driver.execute_script("arguments[0].click();", download_button)
-                debug_print("✅ Clicked download button in dropdown", "SUCCESS")
-                download_clicked = True
-    except Exception as e:
-        debug_print(f"Strategy 1 failed: {e}", "DEBUG")
+    if not download_clicked:
+        try:
+            debug_print("Strategy 1: Looking for viewer-download-controls", "DEBUG")
+            download_controls = wait_until(
+                driver, EC.presence_of_element_located((By.CSS_SELECTOR, "viewer-download-controls")),
+                timeout=3, label="PDF viewer controls"
+            )
+            if download_controls:
+                debug_print("✅ Found viewer-download-controls", "SUCCESS")
+                # Click on the download controls (this might open the download dropdown)
+                driver.execute_script("arguments[0].click();", download_controls)
+                
+                # Look for the actual download button in the dropdown
+                download_button = wait_until(
+                    driver, EC.presence_of_element_located((By.CSS_SELECTOR, "cr-icon-button[iron-icon='pdf:file-download']")),
+                    timeout=5, label="PDF download button"
+                )
+                if download_button:
+                    driver.execute_script("arguments[0].click();", download_button)
+                    debug_print("✅ Clicked download button in dropdown", "SUCCESS")
+                    download_clicked = True
+                    download_span.set(method="viewer controls")
+        except Exception as e:
+            debug_print(f"Strategy 1 failed: {e}", "DEBUG")
     
     # Strategy 2: Direct URL download
     if not download_clicked:
@@ -461,19 +509,19 @@ def click_detailed_report_and_download(driver, wait):
             debug_print(f"PDF URL: {pdf_url}", "INFO")
             
             # Navigate directly to the download URL pattern
-            if "brokercheck.finra.org" in pdf_url:
-                # Extract the firm ID from URL or use the known pattern
-                download_url = "https://files.brokercheck.finra.org/firm/firm_361.pdf"
+            crd = crd or crd_from_url(pdf_url)
+            if crd:
+                download_url = report_url(crd)
                 debug_print(f"Attempting direct download from: {download_url}", "INFO")
                 
                 # Open in new tab to trigger download
+                handles_before = driver.window_handles
                 driver.execute_script(f"window.open('{download_url}', '_blank');")
-                time.sleep(3)
+                download_tab = wait_until(driver, new_window_handle(handles_before), timeout=10, label="download tab")
                 
                 # Switch to the new download tab
-                all_handles = driver.window_handles
-                driver.switch_to.window(all_handles[-1])
-                time.sleep(2)
+                driver.switch_to.window(download_tab or driver.window_handles[-1])
+                wait_until(driver, document_ready, timeout=10, label="download tab loaded")
                 
                 # Close this tab and switch back
                 driver.close()
@@ -481,6 +529,7 @@ def click_detailed_report_and_download(driver, wait):
                 
                 debug_print("✅ Direct download attempted", "SUCCESS")
                 download_clicked = True
+                download_span.set(method="direct url")
         except Exception as e:
             debug_print(f"Strategy 2 failed: {e}", "DEBUG")
     
@@ -495,6 +544,7 @@ def click_detailed_report_and_download(driver, wait):
                         driver.execute_script("arguments[0].click();", btn)
                         debug_print("✅ Clicked download button", "SUCCESS")
                         download_clicked = True
+                        download_span.set(method="icon button")
                         break
         except Exception as e:
             debug_print(f"Strategy 3 failed: {e}", "DEBUG")
@@ -505,11 +555,12 @@ def click_detailed_report_and_download(driver, wait):
             debug_print("Strategy 4: Using keyboard shortcut Ctrl+S", "DEBUG")
             actions = ActionChains(driver)
             actions.key_down(Keys.CONTROL).send_keys('s').key_up(Keys.CONTROL).perform()
-            time.sleep(2)
+            # The native save dialog isn't visible to WebDriver, so there is nothing to wait on
             # Press Enter to confirm save dialog (might not work in all environments)
             actions.send_keys(Keys.RETURN).perform()
             debug_print("✅ Keyboard shortcut sent", "SUCCESS")
             download_clicked = True
+            download_span.set(method="ctrl+s")
         except Exception as e:
             debug_print(f"Strategy 4 failed: {e}", "DEBUG")
     
@@ -521,12 +572,31 @@ def click_detailed_report_and_download(driver, wait):
     # Switch back to main tab
     debug_print("Switching back to main tab", "INFO")
     driver.switch_to.window(main_window)
-    time.sleep(2)
     
-    return download_clicked
+    if not download_clicked:
+        download_span.end("failed")
+        return False
+    
+    # Move on as soon as the file is complete on disk
+    download = driver.downloads.wait_for_download(downloads_before, rename_to=f"firm_{crd}.pdf" if crd else None)
+    if download:
+        debug_print(f"✅ Saved {download['path']} ({download['size']} bytes) in {download['elapsed']}s", "SUCCESS")
+        download_span.end("ok", path=download["path"], size=download["size"])
+    else:
+        debug_print("❌ Download did not complete", "ERROR")
+        download_span.end("failed")
+    return download
 
 
-def open_site():
+def start_browser(download_dir=None, headless=False, profile="default", window_size=None, capture_network=False):
+    """Start Chrome configured for BrokerCheck and return (driver, wait).
+
+    profile="lean" runs headless with images, fonts and trackers blocked (see profiles.py).
+    capture_network=True reads search results from the API responses instead of the DOM.
+    Downloads go to download_dir, or a fresh per-session directory (driver.downloads).
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown browser profile {profile!r}, expected one of {PROFILES}")
     chrome_options = Options()
     
     # Configure Chrome to automatically download PDFs instead of opening them
@@ -536,59 +606,123 @@ def open_site():
         "plugins.always_open_pdf_externally": True,  # This makes Chrome download PDFs instead of opening them
         "profile.default_content_setting_values.automatic_downloads": 1  # Allow multiple downloads
     }
+    if download_dir:
+        prefs["download.default_directory"] = os.path.abspath(download_dir)
+    
+    if profile == "lean":
+        apply_lean_options(chrome_options, prefs, window_size or DEFAULT_WINDOW_SIZE)
+    elif headless:
+        chrome_options.add_argument("--headless=new")
+        size = window_size or (1920, 1080)
+        chrome_options.add_argument(f"--window-size={size[0]},{size[1]}")
+    elif window_size:
+        chrome_options.add_argument(f"--window-size={window_size[0]},{window_size[1]}")
+    else:
+        chrome_options.add_argument("--start-maximized")
     chrome_options.add_experimental_option("prefs", prefs)
-    
-    chrome_options.add_argument("--start-maximized")
+    if capture_network:
+        enable_network_capture(chrome_options)
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
 
     debug_print("Starting Chrome browser...", "INFO")
     driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
+        service=Service(resolve_chromedriver()),
         options=chrome_options
     )
     
     # Remove automation traces
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    install_request_tracker(driver)
+    driver.capture_network = capture_network
+    driver.downloads = DownloadManager(driver, download_dir)
+    if profile == "lean":
+        block_nonessential(driver)
 
     wait = WebDriverWait(driver, 30)
+    return driver, wait
+
+
+def open_search_form(driver, wait):
+    """Load the home page, accept cookies and switch to the Firm tab.
+
+    Call this for a driver's first navigation: a saved session state is restored
+    beforehand so the consent banner never shows.
+    """
+    try:
+        restored = restore_session_state(driver)
+    except Exception as e:
+        debug_print(f"Could not restore session state: {e}", "DEBUG")
+        restored = False
     
-    debug_print("Navigating to https://brokercheck.finra.org/", "INFO")
-    driver.get("https://brokercheck.finra.org/")
-    time.sleep(3)
+    debug_print(f"Navigating to {HOME_URL}", "INFO")
+    driver.get(HOME_URL)
+    wait_until(driver, page_settled, timeout=15, label="home page settled")
 
     # ---------- 1️⃣ Handle Cookie Consent ----------
-    debug_print("\n--- HANDLING COOKIE CONSENT ---", "INFO")
-    try:
-        # Try multiple cookie button selectors
-        cookie_selectors = [
-            "//button[contains(text(),'Continue')]",
-            "//button[contains(text(),'continue')]",
-            "//button[contains(@class,'cookie')]",
-            "//button[contains(text(),'Accept')]",
-            "//button[contains(text(),'Customize')]"
-        ]
-        
-        for selector in cookie_selectors:
+    if restored and not cookie_banner_shown(driver):
+        debug_print("🍪 Consent restored from saved session state", "INFO")
+        start_span("cookie_consent", restored=True).end("skipped")
+    else:
+        if restored:
+            debug_print("🍪 Saved consent was not honoured, banner is showing", "WARNING")
+        # Only a banner we actually dismissed leaves consent cookies worth saving
+        if handle_cookie_consent(driver) == "dismissed":
             try:
-                elements = driver.find_elements(By.XPATH, selector)
-                if elements and elements[0].is_displayed():
-                    debug_print(f"Found cookie button: {selector}", "INFO")
-                    # Try both click methods
-                    try:
-                        elements[0].click()
-                    except:
-                        driver.execute_script("arguments[0].click();", elements[0])
-                    debug_print("🍪 Cookie button clicked", "SUCCESS")
-                    time.sleep(2)
-                    break
+                capture_session_state(driver)
             except Exception as e:
-                continue
+                debug_print(f"Could not save session state: {e}", "DEBUG")
+
+    # ---------- 2️⃣ Click Firm tab with verification ----------
+    return click_firm_tab(driver, wait)
+
+
+def cookie_banner_shown(driver):
+    """True if any cookie consent button is visible, without touching the locator stats"""
+    for by, selector in COOKIE_SELECTORS:
+        try:
+            if any(e.is_displayed() for e in driver.find_elements(by, selector)):
+                return True
+        except Exception:
+            pass
+    return False
+
+
+@traced("cookie_consent")
+def handle_cookie_consent(driver):
+    """Dismiss the cookie consent banner if it is shown.
+
+    Returns "dismissed", "absent" when there was no banner, or False if dismissing it failed.
+    """
+    debug_print("\n--- HANDLING COOKIE CONSENT ---", "INFO")
+    try:
+        cookie_button, matched = LOCATORS.find(driver, "cookie_button", COOKIE_SELECTORS)
+        if not cookie_button:
+            annotate(banner=False)
+            return "absent"
+        debug_print(f"Found cookie button: {matched[1]}", "INFO")
+        annotate(selector=matched[1])
+        # Try both click methods
+        try:
+            cookie_button.click()
+            annotate(method="normal click")
+        except:
+            driver.execute_script("arguments[0].click();", cookie_button)
+            annotate(method="JavaScript click")
+        debug_print("🍪 Cookie button clicked", "SUCCESS")
+        if not wait_until(driver, element_gone(cookie_button), timeout=5, label="cookie banner closed"):
+            debug_print("⚠️ Cookie banner still showing after the click", "WARNING")
+            return False
+        return "dismissed"
     except Exception as e:
         debug_print(f"Cookie handling: {e}", "DEBUG")
+        return False
 
-    # ---------- 2️⃣ Click Firm tab with verification ----------
+
+@traced("firm_tab")
+def click_firm_tab(driver, wait):
+    """Switch the search form to the Firm tab"""
     debug_print("\n--- CLICKING FIRM TAB ---", "INFO")
     
     # Wait for the tab to be clickable
@@ -610,6 +744,7 @@ def open_site():
         try:
             method_func()
             debug_print(f"✅ {method_name} succeeded", "SUCCESS")
+            annotate(method=method_name)
             click_success = True
             break
         except Exception as e:
@@ -617,19 +752,22 @@ def open_site():
     
     if not click_success:
         debug_print("❌ All click methods failed for Firm tab!", "ERROR")
-        return driver
+        return False
     
     debug_print("🏢 Firm tab clicked", "SUCCESS")
-    time.sleep(3)
+    wait_until(driver, EC.visibility_of_element_located((By.CSS_SELECTOR, "input[formcontrolname='firmNameCrd']")),
+               timeout=5, label="firm input visible")
     
     # Inspect what's visible after clicking
     inspect_firm_section(driver, wait)
+    return True
 
-    # ---------- 3️⃣ Wait for Firm Name input with fallback ----------
+
+def locate_firm_input(driver, wait):
+    """Find the visible Firm Name / CRD input, re-clicking the Firm tab if needed"""
     debug_print("\n--- LOCATING FIRM INPUT ---", "INFO")
     
     # Try multiple strategies to find the input
-    firm_input = None
     input_strategies = [
         (By.CSS_SELECTOR, "input[formcontrolname='firmNameCrd']"),
         (By.CSS_SELECTOR, "input[aria-label='firm-name']"),
@@ -639,21 +777,10 @@ def open_site():
         (By.XPATH, "//div[contains(text(), 'Firm Name')]/following::input[1]")
     ]
     
-    for by, selector in input_strategies:
-        try:
-            debug_print(f"Trying to find input with: {selector}", "DEBUG")
-            elements = driver.find_elements(by, selector)
-            if elements:
-                for elem in elements:
-                    if elem.is_displayed():
-                        firm_input = elem
-                        debug_print(f"✅ Found visible input with: {selector}", "SUCCESS")
-                        break
-            if firm_input:
-                break
-        except Exception as e:
-            debug_print(f"Error with {selector}: {e}", "DEBUG")
-            continue
+    firm_input, matched = LOCATORS.find(driver, "firm_input", input_strategies,
+                                        log=lambda m: debug_print(m, "DEBUG"))
+    if firm_input:
+        debug_print(f"✅ Found visible input with: {matched[1]}", "SUCCESS")
     
     if not firm_input:
         debug_print("❌ Could not find firm input with any strategy!", "ERROR")
@@ -666,35 +793,41 @@ def open_site():
             # Try clicking Firm tab again with JavaScript
             firm_tab = driver.find_element(By.XPATH, "//li[.//div[contains(.,'Firm')]]")
             driver.execute_script("arguments[0].click();", firm_tab)
-            time.sleep(3)
             # Try finding input again
             try:
                 firm_input = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "input[formcontrolname='firmNameCrd']")))
                 debug_print("✅ Found input after second click attempt", "SUCCESS")
             except:
                 pass
-        
-        if not firm_input:
-            return driver
+    
+    return firm_input
+
+
+def search_firm(driver, wait, firm):
+    """Enter a firm name or CRD, click Search and wait for results.
+
+    Returns True if results appeared. On a driver started with capture_network=True
+    it returns the parsed search API records instead (an empty list means no results).
+    """
+    # ---------- 3️⃣ Wait for Firm Name input with fallback ----------
+    firm_input = locate_firm_input(driver, wait)
+    if not firm_input:
+        return False
     
     # Scroll and focus
     driver.execute_script("arguments[0].scrollIntoView({block:'center', behavior: 'instant'});", firm_input)
-    time.sleep(1)
     
     # Click to focus
     try:
         firm_input.click()
     except:
         driver.execute_script("arguments[0].click();", firm_input)
-    
-    time.sleep(1)
 
     # ---------- 4️⃣ Set firm name ----------
     debug_print("\n--- SETTING FIRM NAME ---", "INFO")
-    test_value = "Goldman Sachs"
     
     # Force the input to update
-    success = force_input_update(driver, firm_input, test_value)
+    success = force_input_update(driver, firm_input, firm)
     
     if not success:
         debug_print("❌ Failed to set value properly!", "ERROR")
@@ -705,25 +838,28 @@ def open_site():
             input.value = arguments[1];
             input.dispatchEvent(new Event('input', { bubbles: true }));
             input.dispatchEvent(new Event('change', { bubbles: true }));
-        """, firm_input, test_value)
-        time.sleep(2)
+        """, firm_input, firm)
+        wait_until(driver, angular_stable, timeout=2, label="Angular after JS set")
     
     # Verify the value was set
     current_value = driver.execute_script("return arguments[0].value;", firm_input)
     debug_print(f"Final value in input: '{current_value}'", "INFO")
     
     # Take screenshot for verification
-    driver.save_screenshot("debug_screenshot_before_search.png")
-    debug_print("Screenshot saved before search", "INFO")
+    capture(driver, "before_search")
     
-    # Wait a moment for Angular to process
-    time.sleep(2)
+    # Wait for Angular to process
+    wait_until(driver, angular_stable, timeout=2, label="Angular after input")
 
     # ---------- 5️⃣ Click Search button ----------
     debug_print("\n--- CLICKING SEARCH BUTTON ---", "INFO")
     
+    capture_network = getattr(driver, "capture_network", False)
+    if capture_network:
+        # Forget responses from earlier searches
+        drain_performance_log(driver)
+    
     # Find search button with multiple strategies
-    search_button = None
     search_selectors = [
         (By.CSS_SELECTOR, "button[aria-label='FirmSearch']"),
         (By.XPATH, "//button[contains(@class,'search-button')]"),
@@ -733,23 +869,17 @@ def open_site():
         (By.XPATH, "//button[contains(@class, 'btn-accent')]")
     ]
     
-    for by, selector in search_selectors:
-        try:
-            elements = driver.find_elements(by, selector)
-            if elements:
-                for elem in elements:
-                    if elem.is_displayed() and elem.is_enabled():
-                        search_button = elem
-                        debug_print(f"Found search button with: {selector}", "DEBUG")
-                        break
-            if search_button:
-                break
-        except:
-            continue
+    search_span = start_span("search")
+    search_button, matched = LOCATORS.find(driver, "search_button", search_selectors,
+                                           predicate=lambda e: e.is_displayed() and e.is_enabled())
+    if search_button:
+        debug_print(f"Found search button with: {matched[1]}", "DEBUG")
+        search_span.set(selector=matched[1])
     
     if not search_button:
         debug_print("❌ Could not find search button!", "ERROR")
-        return driver
+        search_span.end("failed")
+        return False
     
     # Try multiple click methods
     click_success = False
@@ -763,6 +893,7 @@ def open_site():
         try:
             method_func()
             debug_print(f"✅ {method_name} succeeded", "SUCCESS")
+            search_span.set(method=method_name)
             click_success = True
             break
         except Exception as e:
@@ -770,19 +901,30 @@ def open_site():
     
     if not click_success:
         debug_print("❌ All click methods failed for search button!", "ERROR")
-        return driver
+        search_span.end("failed")
+        return False
     
     debug_print("🔍 Search button clicked", "INFO")
-    time.sleep(3)
+    search_span.end("ok")
+    
+    if capture_network:
+        # Exact results straight from the search API response - no DOM polling
+        with span("results_wait", source="network") as wait_span:
+            records = wait_for_search_response(driver, timeout=30)
+            wait_span.outcome = "ok" if records is not None else "failed"
+        if records is not None:
+            debug_print(f"✅ Search API returned {len(records)} firms", "SUCCESS")
+            return records
+        debug_print("⚠️ No search API response captured, falling back to the DOM", "WARNING")
 
     # ---------- 6️⃣ Wait for results ----------
     debug_print("\n--- WAITING FOR RESULTS ---", "INFO")
     
-    # Look for any of these indicators
+    # Look for any of these indicators. Only rendered results (or "No results") count:
+    # the SPA pushes /search/results and shows its spinner before the API has answered
     result_indicators = [
         "div.table-container",
         ".search-results",
-        ".loading-spinner",
         ".crd-number",
         ".firm-result",
         "app-firm-results",
@@ -794,45 +936,21 @@ def open_site():
         ".results-list"
     ]
     
-    start_time = time.time()
-    timeout = 30
-    found = False
-    
-    while time.time() - start_time < timeout:
-        # Check for any results
-        for indicator in result_indicators:
-            try:
-                if indicator.startswith("//"):
-                    elements = driver.find_elements(By.XPATH, indicator)
-                else:
-                    elements = driver.find_elements(By.CSS_SELECTOR, indicator)
-                
-                if elements:
-                    for elem in elements[:3]:  # Check first few
-                        if elem.is_displayed() and elem.text.strip():
-                            debug_print(f"✅ Found indicator: {indicator}", "SUCCESS")
-                            debug_print(f"Sample text: {elem.text[:100]}", "INFO")
-                            found = True
-                            break
-                    if found:
-                        break
-            except:
-                continue
-        
-        if found:
-            break
-        
-        # Check for URL change
-        if "search" in driver.current_url or "results" in driver.current_url:
-            debug_print(f"URL changed to: {driver.current_url}", "INFO")
-            found = True
-            break
-        
-        time.sleep(1)
+    # One in-page MutationObserver watches every indicator and returns as soon as one matches
+    with span("results_wait", source="dom") as wait_span:
+        hit = wait_for_any(driver, result_indicators, timeout=30, label="search results")
+        if hit:
+            wait_span.set(selector=hit["indicator"])
+        else:
+            wait_span.outcome = "failed"
+    found = hit is not None
+    if found:
+        debug_print(f"✅ Found indicator: {hit['indicator']}", "SUCCESS")
+        debug_print(f"Sample text: {hit['text']}", "INFO")
     
     if not found:
         debug_print("⚠️ Timeout waiting for results", "WARNING")
-        driver.save_screenshot("debug_screenshot_timeout.png")
+        capture(driver, "results_timeout")
         
         # Check for error message
         try:
@@ -842,15 +960,160 @@ def open_site():
         except:
             pass
     
-    # ---------- 7️⃣ Click on the first result ----------
-    if found:
-        if click_first_result(driver, wait):
-            # ---------- 8️⃣ Click Detailed Report and Download PDF ----------
-            click_detailed_report_and_download(driver, wait)
-        else:
-            debug_print("⚠️ Skipping Detailed Report because first result click failed", "WARNING")
+    return found
+
+
+def _download_report(driver, wait, result, downloader):
+    """Fetch the Detailed Report over HTTP when possible, otherwise through the browser"""
+    if downloader and result.get("crd"):
+        with span("download", method="http") as download_span:
+            download = downloader.download(result["crd"])
+            download_span.set(path=download["path"], size=download.get("bytes"), unchanged=download.get("unchanged"))
+            if download["status"] != "downloaded":
+                download_span.outcome = "failed"
+        result["pdf_path"] = download["path"]
+        result["report_unchanged"] = download.get("unchanged", False)
+        downloaded = download["status"] == "downloaded"
     else:
-        debug_print("⚠️ Skipping result click because results not found", "WARNING")
+        download = click_detailed_report_and_download(driver, wait, result.get("crd"))
+        if download:
+            result["pdf_path"] = download["path"]
+            result["bytes"] = download["size"]
+        downloaded = bool(download)
+    if downloaded and not result.get("report_unchanged"):
+        version = archive_report(result.get("crd"), result.get("pdf_path"), source="http" if downloader else "browser")
+        if version:
+            result["sha256"] = version["sha256"]
+    return "downloaded" if downloaded else "download_failed"
+
+
+def lookup_firm(driver, wait, firm, downloader=None, job_id=None):
+    """Run search -> first result -> Detailed Report for one firm name or CRD on an open Firm search form.
+
+    With a downloader.PdfDownloader the report is fetched over HTTP instead of through the browser.
+    Diagnostics captured during the job are written to disk only if it fails.
+    """
+    debug_print(f"\n===== LOOKING UP FIRM: {firm} =====", "INFO")
+    start = time.time()
+    job_id = job_id or new_job_id(firm)
+    start_job(job_id)
+    reset_wait_log()
+    result = {"firm": firm, "job_id": job_id, "status": "no_results"}
+    lookup_span = start_span("lookup", firm=firm)
+    
+    try:
+        found = search_firm(driver, wait, firm)
+        if isinstance(found, list) and found:
+            # Network capture gave us the exact first result: go straight to it by CRD
+            record = found[0]
+            result.update(crd=record["crd"], name=record["name"], location=record["location"],
+                          detail_url=detail_url(record["crd"]), records=found)
+            if not downloader:
+                driver.get(result["detail_url"])
+                wait_for_detail_page(driver)
+            result["status"] = _download_report(driver, wait, result, downloader)
+        elif found is True:
+            # ---------- 7️⃣ Click on the first result ----------
+            if click_first_result(driver, wait, firm):
+                # ---------- 8️⃣ Click Detailed Report and Download PDF ----------
+                result["detail_url"] = driver.current_url
+                result["crd"] = crd_from_url(result["detail_url"])
+                result["status"] = _download_report(driver, wait, result, downloader)
+            else:
+                debug_print("⚠️ Skipping Detailed Report because first result click failed", "WARNING")
+                result["status"] = "click_failed"
+        else:
+            debug_print("⚠️ Skipping result click because results not found", "WARNING")
+    except Exception as e:
+        finish_job(driver, failed=True)
+        LOCATORS.save()
+        lookup_span.end("error", error=f"{type(e).__name__}: {e}")
+        flush_spans()
+        raise
+    
+    debug_dir = finish_job(driver, failed=result["status"] != "downloaded")
+    # Locator stats are merged into the shared file once per job, not on every find
+    LOCATORS.save()
+    if debug_dir:
+        result["debug_dir"] = debug_dir
+        debug_print(f"Diagnostics saved to {debug_dir}", "INFO")
+    result["elapsed"] = round(time.time() - start, 2)
+    result["wait_seconds"] = total_wait_time()
+    lookup_span.end("ok" if result["status"] == "downloaded" else "failed", status=result["status"], crd=result.get("crd"))
+    flush_spans()
+    return result
+
+
+def return_to_search_form(driver, wait):
+    """Close leftover report tabs and bring the main tab back to the Firm search form"""
+    debug_print("\n--- RETURNING TO SEARCH FORM ---", "INFO")
+    # Its own job, so spans and captures here aren't filed under the firm looked up before
+    start_job(new_job_id("repark"))
+    main_window = driver.window_handles[0]
+    for handle in driver.window_handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(main_window)
+    
+    # Consent cookies live in the session, so the banner won't come back
+    driver.get(HOME_URL)
+    return click_firm_tab(driver, wait)
+
+
+def run_batch(firms, downloader=None, capture_network=False, store=None):
+    """Look up many firm names / CRD numbers in a single Chrome session.
+
+    Firms the FirmStore already resolved within its TTL are answered from disk;
+    the browser is only started if anything is left to look up.
+    """
+    firms = list(firms)
+    store = store or FirmStore()
+    results, misses = store.split(firms, require_pdf=True)
+    if results:
+        debug_print(f"📦 {len(results)}/{len(firms)} firms answered from the local store", "INFO")
+    
+    driver = wait = None
+    try:
+        for index, firm in misses:
+            try:
+                if driver is None:
+                    driver, wait = start_browser(capture_network=capture_network)
+                    form_ready = open_search_form(driver, wait)
+                else:
+                    form_ready = return_to_search_form(driver, wait)
+                
+                if form_ready:
+                    results[index] = lookup_firm(driver, wait, firm, downloader)
+                    store.put(firm, results[index])
+                else:
+                    results[index] = {"firm": firm, "status": "error", "error": "Firm search form not available"}
+            except Exception as e:
+                debug_print(f"🔥 Lookup failed for {firm}: {e}", "ERROR")
+                results[index] = {"firm": firm, "status": "error", "error": str(e)}
+                # Carry on with a fresh browser rather than a half-broken one
+                if driver is not None:
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = wait = None
+    finally:
+        if driver is not None:
+            driver.quit()
+    
+    results = [results[index] for index in range(len(firms))]
+    ok = sum(1 for r in results if r["status"] == "downloaded")
+    debug_print(f"✅ Batch completed: {ok}/{len(results)} firms downloaded", "SUCCESS")
+    return results
+
+
+def open_site(firm="Goldman Sachs"):
+    driver, wait = start_browser()
+    
+    if not open_search_form(driver, wait):
+        return driver
+    
+    lookup_firm(driver, wait, firm)
     
     debug_print("✅ Script completed!", "SUCCESS")
     return driver
@@ -858,11 +1121,16 @@ def open_site():
 
 if __name__ == "__main__":
     try:
-        driver = open_site()
-        debug_print("\n🎯 Script finished. Browser will stay open until you press Enter.", "INFO")
-        input("Press Enter to close browser...")
-        driver.quit()
+        if len(sys.argv) > 1:
+            # python bot2.py "Goldman Sachs" 361 "Morgan Stanley"
+            for r in run_batch(sys.argv[1:]):
+                debug_print(f"{r['firm']}: {r['status']}", "INFO")
+        else:
+            driver = open_site()
+            debug_print("\n🎯 Script finished. Browser will stay open until you press Enter.", "INFO")
+            input("Press Enter to close browser...")
+            driver.quit()
     except Exception as e:
         debug_print(f"🔥 Unhandled exception: {e}", "ERROR")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
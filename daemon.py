@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bot2 import start_browser, open_search_form, return_to_search_form, lookup_firm
+from downloader import PdfDownloader
+from driver_resolver import resolve_chromedriver
+from firm_store import FirmStore
+from log import debug_print
+
+
+class BrowserDaemon:
+    """Keeps N browsers parked on the Firm search form and hands them out per lookup"""
+
+    def __init__(self, browsers=2, profile="lean", download_root="downloads", http_download=True,
+                 capture_network=False, store=None):
+        self.browsers = browsers
+        self.profile = profile
+        self.capture_network = capture_network
+        self.download_root = download_root
+        self.idle = queue.Queue()
+        self.downloader = PdfDownloader(os.path.join(download_root, "daemon"), max_workers=browsers) if http_download else None
+        self.store = store or FirmStore()
+        self.closed = False
+
+    def start(self):
+        resolve_chromedriver()
+        threads = [threading.Thread(target=self._start_slot, args=(i,)) for i in range(self.browsers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        debug_print(f"✅ {self.idle.qsize()}/{self.browsers} browsers parked on the Firm search form", "SUCCESS")
+
+    def _start_slot(self, slot_id):
+        download_dir = os.path.abspath(os.path.join(self.download_root, f"daemon-{slot_id}"))
+        os.makedirs(download_dir, exist_ok=True)
+        try:
+            driver, wait = start_browser(download_dir=download_dir, headless=True, profile=self.profile,
+                                         capture_network=self.capture_network)
+        except Exception as e:
+            debug_print(f"🔥 Browser {slot_id} failed to start: {e}", "ERROR")
+            return
+        slot = {"id": slot_id, "driver": driver, "wait": wait, "download_dir": download_dir}
+        if self._safe(open_search_form, slot):
+            self.idle.put(slot)
+        else:
+            debug_print(f"🔥 Browser {slot_id} could not reach the search form", "ERROR")
+            self._quit(slot)
+
+    def _safe(self, func, slot):
+        try:
+            return func(slot["driver"], slot["wait"])
+        except Exception as e:
+            debug_print(f"Browser {slot['id']}: {e}", "DEBUG")
+            return False
+
+    def _quit(self, slot):
+        try:
+            slot["driver"].quit()
+        except Exception:
+            pass
+
+    def _repark(self, slot, broken):
+        """Put the browser back on the search form, or replace it if that fails"""
+        if self.closed:
+            self._quit(slot)
+            return
+        if not broken and self._safe(return_to_search_form, slot):
+            self.idle.put(slot)
+            return
+        self._quit(slot)
+        self._start_slot(slot["id"])
+
+    def lookup(self, firm, timeout=120):
+        cached = self.store.get(firm)
+        if cached is not None:
+            return cached
+        start = time.time()
+        try:
+            slot = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            return {"firm": firm, "status": "error", "error": "No browser became free in time"}
+        dispatch = round(time.time() - start, 3)
+
+        broken = False
+        try:
+            result = lookup_firm(slot["driver"], slot["wait"], firm, self.downloader)
+            self.store.put(firm, result)
+        except Exception as e:
+            broken = True
+            result = {"firm": firm, "status": "error", "error": str(e)}
+        result["dispatch_seconds"] = dispatch
+        result["browser"] = slot["id"]
+
+        # Re-park in the background so the caller gets its answer right away
+        threading.Thread(target=self._repark, args=(slot, broken), daemon=True).start()
+        return result
+
+    def close(self):
+        self.closed = True
+        while True:
+            try:
+                self._quit(self.idle.get_nowait())
+            except queue.Empty:
+                break
+        if self.downloader:
+            self.downloader.close()
+        self.store.close()
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    """GET /health, POST /lookup {"firm": "<name or CRD>"}"""
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send(404, {"error": "not found"})
+        daemon = self.server.lookups
+        self._send(200, {"browsers": daemon.browsers, "idle": daemon.idle.qsize()})
+
+    def do_POST(self):
+        if self.path != "/lookup":
+            return self._send(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            firm = str(json.loads(self.rfile.read(length) or b"{}")["firm"]).strip()
+        except (ValueError, KeyError, TypeError):
+            return self._send(400, {"error": 'expected JSON body {"firm": "<name or CRD>"}'})
+        if not firm:
+            return self._send(400, {"error": "firm must not be empty"})
+        self._send(200, self.server.lookups.lookup(firm))
+
+    def log_message(self, format, *args):
+        debug_print(f"{self.address_string()} {format % args}", "DEBUG")
+
+
+def serve(host="127.0.0.1", port=8765, browsers=2, profile="lean", http_download=True, capture_network=False):
+    daemon = BrowserDaemon(browsers=browsers, profile=profile, http_download=http_download,
+                           capture_network=capture_network)
+    daemon.start()
+    server = ThreadingHTTPServer((host, port), LookupHandler)
+    server.lookups = daemon
+    debug_print(f"🎯 Lookup daemon listening on http://{host}:{port}", "INFO")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.close()
+
+
+if __name__ == "__main__":
+    # python daemon.py --browsers 2
+    # curl -s -X POST localhost:8765/lookup -d '{"firm": "Goldman Sachs"}'
+    parser = argparse.ArgumentParser(description="Warm BrokerCheck lookup daemon")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--browsers", type=int, default=2)
+    parser.add_argument("--profile", default="lean")
+    parser.add_argument("--browser-download", action="store_true", help="download PDFs through the browser instead of HTTP")
+    parser.add_argument("--network", action="store_true", help="read search results from the API responses")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.browsers, args.profile, http_download=not args.browser_download,
+          capture_network=args.network)
@@ -0,0 +1,119 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+
+
+# off     - no screenshots or DOM dumps at all
+# failure - each capture only notes the step and URL in a ring buffer; if the job fails the
+#           final page is screenshotted and written to disk with those breadcrumbs (default)
+# debug   - every capture is written to disk immediately, like the original scripts
+LEVELS = ("off", "failure", "debug")
+
+LEVEL = os.environ.get("FINRA_DIAGNOSTICS", "failure")
+OUTPUT_DIR = os.environ.get("FINRA_DEBUG_DIR", "debug")
+BUFFER_SIZE = 32
+
+_local = threading.local()
+
+
+def set_level(level):
+    global LEVEL
+    if level not in LEVELS:
+        raise ValueError(f"Unknown diagnostics level {level!r}, expected one of {LEVELS}")
+    LEVEL = level
+
+
+def _slug(text, limit=40):
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", str(text)).strip("_")[:limit] or "job"
+
+
+def new_job_id(firm):
+    return f"{_slug(firm)}-{os.getpid()}-{int(time.time() * 1000)}"
+
+
+def start_job(job_id):
+    """Start a fresh breadcrumb buffer for the job running on this thread"""
+    _local.job_id = job_id
+    _local.seq = 0
+    _local.buffer = deque(maxlen=BUFFER_SIZE)
+
+
+def current_job():
+    return getattr(_local, "job_id", None) or "nojob"
+
+
+def capture(driver, name, dom=True):
+    """Record this step under the current job: a screenshot and DOM dump in debug mode, a breadcrumb otherwise"""
+    if LEVEL == "off":
+        return
+    if not hasattr(_local, "buffer"):
+        start_job(current_job())
+    _local.seq += 1
+    try:
+        entry = {"seq": _local.seq, "name": name, "time": time.time(), "url": driver.current_url}
+        if LEVEL == "debug":
+            entry.update(png=driver.get_screenshot_as_png(), html=driver.page_source if dom else None)
+    except Exception:
+        return
+    if LEVEL == "debug":
+        _write(entry)
+    else:
+        _local.buffer.append(entry)
+
+
+def finish_job(driver=None, failed=False):
+    """End the current job; on failure, capture the final page and write it to disk with the breadcrumbs.
+
+    Returns the directory the files went to, or None if nothing was written.
+    """
+    try:
+        return _finish(driver, failed)
+    finally:
+        # Whatever this thread does next (re-parking the browser, ...) is no longer part of the job
+        _local.job_id = None
+
+
+def _finish(driver, failed):
+    if LEVEL == "off" or not hasattr(_local, "buffer"):
+        return None
+    if LEVEL == "debug":
+        if failed and driver is not None:
+            capture(driver, "failure")
+        # Already on disk
+        return _job_dir()
+    breadcrumbs = list(_local.buffer)
+    _local.buffer.clear()
+    if not failed:
+        return None
+    os.makedirs(_job_dir(), exist_ok=True)
+    with open(os.path.join(_job_dir(), "steps.log"), "w", encoding="utf-8") as f:
+        for crumb in breadcrumbs:
+            f.write(f"{crumb['seq']:02d} {time.strftime('%H:%M:%S', time.localtime(crumb['time']))} "
+                    f"{crumb['name']} {crumb['url']}\n")
+    if driver is not None:
+        _local.seq += 1
+        try:
+            _write({"seq": _local.seq, "name": "failure", "url": driver.current_url,
+                    "png": driver.get_screenshot_as_png(), "html": driver.page_source})
+        except Exception:
+            pass
+    return _job_dir()
+
+
+def _job_dir():
+    return os.path.join(OUTPUT_DIR, _slug(current_job(), limit=120))
+
+
+def _write(entry):
+    # Files are named per job so parallel workers never overwrite each other
+    job_dir = _job_dir()
+    os.makedirs(job_dir, exist_ok=True)
+    base = os.path.join(job_dir, f"{entry['seq']:02d}_{_slug(entry['name'])}")
+    with open(base + ".png", "wb") as f:
+        f.write(entry["png"])
+    if entry["html"] is not None:
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write(f"<!-- {entry['url']} -->\n")
+            f.write(entry["html"])
@@ -0,0 +1,133 @@
+import time
+
+from waits import record_wait
+
+
+DEFAULT_ATTRIBUTES = ["id", "name", "placeholder", "class", "formcontrolname", "aria-label", "type"]
+
+
+# arguments[0]: {name: {"css": selector} | {"xpath": expression}}
+# arguments[1]: attribute names, arguments[2]: max characters of text per element
+SNAPSHOT_JS = """
+var queries = arguments[0], attributes = arguments[1], textLimit = arguments[2];
+
+function visible(el) {
+    var style = window.getComputedStyle(el);
+    if (style.display === 'none' || style.visibility === 'hidden' || style.opacity === '0') return false;
+    return el.getClientRects().length > 0;
+}
+
+function describe(el) {
+    var attrs = {};
+    attributes.forEach(function(a) { attrs[a] = el.getAttribute(a); });
+    var r = el.getBoundingClientRect();
+    return {
+        tag: el.tagName.toLowerCase(),
+        attrs: attrs,
+        value: el.value === undefined ? null : el.value,
+        visible: visible(el),
+        rect: {x: r.x, y: r.y, width: r.width, height: r.height},
+        text: (el.innerText || '').trim().slice(0, textLimit)
+    };
+}
+
+var out = {};
+Object.keys(queries).forEach(function(name) {
+    var q = queries[name], els = [];
+    if (q.xpath) {
+        var res = document.evaluate(q.xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < res.snapshotLength; i++) els.push(res.snapshotItem(i));
+    } else {
+        els = Array.prototype.slice.call(document.querySelectorAll(q.css));
+    }
+    out[name] = els.filter(function(el) { return el.nodeType === 1; }).map(describe);
+});
+return out;
+"""
+
+
+def dom_snapshot(driver, queries, attributes=DEFAULT_ATTRIBUTES, text_limit=100):
+    """Describe every element matching each query in a single execute_script round-trip.
+
+    queries maps a name to {"css": selector} or {"xpath": expression}. Returns
+    {name: [{"tag", "attrs", "value", "visible", "rect", "text"}, ...]}.
+    """
+    return driver.execute_script(SNAPSHOT_JS, queries, list(attributes), text_limit)
+
+
+# arguments[0]: indicators (XPath if they start with "//", CSS otherwise), arguments[1]: timeout in ms
+WAIT_FOR_ANY_JS = """
+var indicators = arguments[0], timeoutMs = arguments[1];
+var callback = arguments[arguments.length - 1];
+var observer = null, timer = null, interval = null, finished = false;
+
+function visibleWithText(el) {
+    if (el.nodeType !== 1 || el.getClientRects().length === 0) return false;
+    var style = window.getComputedStyle(el);
+    if (style.display === 'none' || style.visibility === 'hidden') return false;
+    return (el.innerText || '').trim().length > 0;
+}
+
+function find(indicator) {
+    if (indicator.indexOf('//') === 0) {
+        var res = document.evaluate(indicator, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var els = [];
+        for (var i = 0; i < Math.min(res.snapshotLength, 3); i++) els.push(res.snapshotItem(i));
+        return els;
+    }
+    return Array.prototype.slice.call(document.querySelectorAll(indicator), 0, 3);
+}
+
+function check() {
+    for (var i = 0; i < indicators.length; i++) {
+        var els;
+        try { els = find(indicators[i]); } catch (e) { continue; }
+        for (var j = 0; j < els.length; j++) {
+            if (visibleWithText(els[j])) {
+                return {indicator: indicators[i], text: els[j].innerText.trim().slice(0, 100)};
+            }
+        }
+    }
+    return null;
+}
+
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    clearInterval(interval);
+    callback(result);
+}
+
+var hit = check();
+if (hit) {
+    finish(hit);
+} else {
+    observer = new MutationObserver(function() {
+        var result = check();
+        if (result) finish(result);
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true, attributes: true});
+    // Safety net for changes that don't mutate the DOM (route changes, CSS transitions)
+    interval = setInterval(function() {
+        var result = check();
+        if (result) finish(result);
+    }, 500);
+    timer = setTimeout(function() { finish(null); }, timeoutMs);
+}
+"""
+
+
+def wait_for_any(driver, indicators, timeout=30, label="any indicator"):
+    """Block until one of the indicators shows a visible element with text, watched in-page by a MutationObserver.
+
+    Returns {"indicator", "text"} for the indicator that fired, or None on timeout.
+    The wait is recorded in the thread's wait log like any other wait.
+    """
+    driver.set_script_timeout(timeout + 5)
+    start = time.perf_counter()
+    result = driver.execute_async_script(WAIT_FOR_ANY_JS, list(indicators), int(timeout * 1000))
+    elapsed = time.perf_counter() - start
+    record_wait(label, elapsed, result is not None)
+    return result
@@ -0,0 +1,88 @@
+import os
+import time
+import itertools
+
+from waits import record_wait
+
+
+DOWNLOAD_ROOT = os.environ.get("FINRA_DOWNLOAD_DIR", "downloads")
+
+# Chrome writes to <name>.crdownload and renames it when the download completes
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".tmp")
+
+_session_ids = itertools.count(1)
+
+
+class DownloadManager:
+    """Gives a browser session its own download directory and tells when a download has landed.
+
+    Completion is read from the directory itself: the new file is done once no
+    .crdownload is left and its size has stopped changing.
+    """
+
+    def __init__(self, driver, download_dir=None, root=DOWNLOAD_ROOT):
+        self.driver = driver
+        self.download_dir = os.path.abspath(
+            download_dir or os.path.join(root, f"session-{os.getpid()}-{next(_session_ids)}")
+        )
+        os.makedirs(self.download_dir, exist_ok=True)
+        # Unlike the download.default_directory pref this also holds for headless Chrome
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+            "behavior": "allow",
+            "downloadPath": self.download_dir,
+            "eventsEnabled": True,
+        })
+
+    def _listing(self):
+        files = {}
+        for entry in os.scandir(self.download_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                files[entry.name] = (stat.st_size, stat.st_mtime)
+        return files
+
+    def mark(self):
+        """Snapshot the directory before triggering a download"""
+        return self._listing()
+
+    def started(self, since):
+        """True once any file, finished or still .crdownload, is new or rewritten since mark()"""
+        return any(since.get(name) != info for name, info in self._listing().items())
+
+    def wait_for_download(self, since, timeout=60, stable_for=0.3, poll=0.1, rename_to=None):
+        """Wait for a file that is new (or rewritten) since mark() to finish.
+
+        Returns {"path", "size", "elapsed"} or None on timeout. With rename_to the
+        file is moved to that name inside the download directory.
+        """
+        start = time.perf_counter()
+        candidate, stable_since = None, None
+        download = None
+        while time.perf_counter() - start < timeout:
+            files = self._listing()
+            changed = {name: info for name, info in files.items() if since.get(name) != info}
+            in_progress = any(name.endswith(PARTIAL_SUFFIXES) for name in changed)
+            complete = [name for name, (size, _) in changed.items()
+                        if size > 0 and not name.endswith(PARTIAL_SUFFIXES)]
+
+            if complete and not in_progress:
+                name = max(complete, key=lambda n: changed[n][1])
+                if (name, changed[name]) != candidate:
+                    candidate, stable_since = (name, changed[name]), time.perf_counter()
+                elif time.perf_counter() - stable_since >= stable_for:
+                    download = {"path": os.path.join(self.download_dir, name), "size": changed[name][0]}
+                    break
+            else:
+                candidate = None
+            time.sleep(poll)
+
+        elapsed = time.perf_counter() - start
+        record_wait("download complete", elapsed, download is not None)
+        if download is None:
+            return None
+        if rename_to and os.path.basename(download["path"]) != rename_to:
+            final_path = os.path.join(self.download_dir, rename_to)
+            os.replace(download["path"], final_path)
+            download["path"] = final_path
+        download["elapsed"] = round(elapsed, 3)
+        return download
@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from fileutil import temp_path, write_json
+from log import debug_print
+
+
+REPORT_BASE_URL = os.environ.get("FINRA_REPORT_BASE_URL", "https://files.brokercheck.finra.org")
+
+
+def report_url(crd, base_url=REPORT_BASE_URL):
+    """Direct URL of a firm's Detailed Report PDF"""
+    return f"{base_url.rstrip('/')}/firm/firm_{int(crd)}.pdf"
+
+
+def pooled_session(pool_size=8, retries=3, backoff=0.5):
+    """A keep-alive requests.Session whose pool holds pool_size connections per host,
+    retrying GETs on connection errors and 429/5xx with exponential backoff"""
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class PdfDownloader:
+    """Fetch firm_{crd}.pdf reports over one pooled keep-alive session, no browser needed"""
+
+    def __init__(self, download_dir="downloads", max_workers=8, retries=3, backoff=0.5,
+                 timeout=30, chunk_size=64 * 1024, base_url=REPORT_BASE_URL):
+        self.download_dir = download_dir
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.base_url = base_url
+        os.makedirs(download_dir, exist_ok=True)
+
+        # One connection per worker thread, all kept alive between reports
+        self.session = pooled_session(pool_size=max_workers, retries=retries, backoff=backoff)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def path_for(self, crd):
+        return os.path.join(self.download_dir, f"firm_{int(crd)}.pdf")
+
+    def _load_validators(self, path):
+        """ETag / Last-Modified saved next to a report we already have"""
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path + ".meta.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_validators(self, path, url, response, size):
+        meta_path = path + ".meta.json"
+        validators = {k: response.headers[h] for k, h in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                      if response.headers.get(h)}
+        if not validators:
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            return
+        write_json(meta_path, dict(validators, url=url, bytes=size, saved_at=time.time()))
+
+    def download(self, crd):
+        """Stream one report to disk. Returns a result dict, never raises.
+
+        If we already have the report, the request is conditional: on a 304 the
+        stored copy is kept, and the result has unchanged=True and bytes=0.
+        """
+        url = report_url(crd, self.base_url)
+        path = self.path_for(crd)
+        result = {"crd": str(crd), "url": url, "path": None, "status": "error"}
+        start = time.time()
+
+        # urllib3 retries connection errors and 429/5xx; this loop also covers
+        # connections that drop halfway through the body
+        for attempt in range(self.retries + 1):
+            try:
+                size, changed = self._fetch(url, path)
+                result.update(status="downloaded", path=path, bytes=size, unchanged=not changed)
+                break
+            except FileNotFoundError:
+                result.update(status="not_found", error=f"HTTP 404 for {url}")
+                break
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                result["error"] = str(e)
+                if attempt < self.retries:
+                    time.sleep(self.backoff * (2 ** attempt))
+            except Exception as e:
+                result["error"] = str(e)
+                break
+
+        result["elapsed"] = round(time.time() - start, 3)
+        level = "SUCCESS" if result["status"] == "downloaded" else "ERROR"
+        status = "not modified" if result.get("unchanged") else result["status"]
+        debug_print(f"firm_{crd}.pdf: {status} in {result['elapsed']}s", level)
+        return result
+
+    def _fetch(self, url, path):
+        # Unique per thread so two fetches of the same CRD never share a temp file
+        tmp_path = temp_path(path, ".part")
+        validators = self._load_validators(path)
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+            if response.status_code == 304:
+                return 0, False
+            if response.status_code == 404:
+                raise FileNotFoundError(url)
+            response.raise_for_status()
+
+            size = 0
+            first_chunk = True
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if first_chunk:
+                            if not chunk.startswith(b"%PDF"):
+                                raise ValueError(f"Response from {url} is not a PDF")
+                            first_chunk = False
+                        f.write(chunk)
+                        size += len(chunk)
+                if first_chunk:
+                    raise ValueError(f"Empty response from {url}")
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            # Only complete files ever appear under the final name
+            os.replace(tmp_path, path)
+            self._save_validators(path, url, response, size)
+        return size, True
+
+    def download_many(self, crds):
+        """Download many reports with at most max_workers in flight. Results keep input order"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.download, crds))
+
+
+if __name__ == "__main__":
+    # python downloader.py 361 7059 ...
+    with PdfDownloader() as downloader:
+        for r in downloader.download_many(sys.argv[1:]):
+            print(r)
@@ -0,0 +1,115 @@
+import os
+import re
+import sys
+import json
+import shutil
+import subprocess
+
+from fileutil import write_json
+
+
+RECORD_PATH = os.environ.get(
+    "FINRA_DRIVER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "finra", "chromedriver.json")
+)
+
+CHROME_BINARIES = [
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+
+VERSION_RE = re.compile(r"(\d+)\.(\d+)\.(\d+)(?:\.(\d+))?")
+
+
+def offline_mode():
+    return os.environ.get("FINRA_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def _run_version(command):
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = VERSION_RE.search(output or "")
+    return match.group(0) if match else None
+
+
+def installed_chrome_version():
+    """Version string of the local Chrome/Chromium, or None if it can't be found"""
+    if sys.platform.startswith("win"):
+        return _run_version(["reg", "query", r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon", "/v", "version"])
+    for binary in CHROME_BINARIES:
+        path = binary if os.path.isabs(binary) else shutil.which(binary)
+        if path and os.path.exists(path):
+            version = _run_version([path, "--version"])
+            if version:
+                return version
+    return None
+
+
+def chromedriver_version(path):
+    return _run_version([path, "--version"])
+
+
+def major(version):
+    return version.split(".")[0] if version else None
+
+
+def load_record(path=RECORD_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_record(record, path=RECORD_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_json(path, record, indent=2)
+
+
+def _usable(record, chrome_version):
+    if not record or not os.path.exists(record.get("driver_path", "")):
+        return False
+    # chromedriver is compatible with the Chrome of the same major version
+    return chrome_version is None or major(record.get("chrome_version")) == major(chrome_version)
+
+
+def resolve_chromedriver(offline=None, record_path=RECORD_PATH):
+    """Path to a chromedriver matching the installed Chrome, without a network call when possible.
+
+    Reuses the recorded path while it still matches Chrome's major version. In
+    offline mode (FINRA_OFFLINE=1) it never touches the network and falls back to
+    a matching chromedriver on PATH.
+    """
+    if offline is None:
+        offline = offline_mode()
+    chrome_version = installed_chrome_version()
+
+    record = load_record(record_path)
+    if _usable(record, chrome_version):
+        return record["driver_path"]
+
+    if offline:
+        on_path = shutil.which("chromedriver")
+        if on_path and (chrome_version is None or major(chromedriver_version(on_path)) == major(chrome_version)):
+            save_record({"driver_path": on_path, "driver_version": chromedriver_version(on_path),
+                         "chrome_version": chrome_version}, record_path)
+            return on_path
+        raise RuntimeError(
+            f"Offline mode: no cached chromedriver for Chrome {chrome_version or '(unknown)'} "
+            f"in {record_path} and none on PATH. Run once online to populate the cache."
+        )
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    driver_path = ChromeDriverManager().install()
+    save_record({
+        "driver_path": driver_path,
+        "driver_version": chromedriver_version(driver_path),
+        "chrome_version": chrome_version,
+    }, record_path)
+    return driver_path
+
+
+if __name__ == "__main__":
+    print(resolve_chromedriver())
@@ -0,0 +1,190 @@
+import os
+import re
+import sys
+import json
+import time
+import glob
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from log import debug_print
+
+
+# Headings of the BrokerCheck Detailed Report, mapped to the section they open
+SECTION_HEADINGS = {
+    "report summary": "summary",
+    "firm profile": "profile",
+    "firm names and locations": "addresses",
+    "firm history": "history",
+    "firm operations": "operations",
+    "registrations": "registrations",
+    "types of business": "business_types",
+    "clearing arrangements": "arrangements",
+    "introducing arrangements": "arrangements",
+    "industry arrangements": "arrangements",
+    "organization affiliates": "affiliates",
+    "disclosure events": "disclosures",
+    "disclosure event details": "disclosures",
+    "regulatory - final": "disclosures",
+    "regulatory - pending": "disclosures",
+    "civil - final": "disclosures",
+    "civil - pending": "disclosures",
+    "arbitration award - award / judgment": "disclosures",
+}
+
+DISCLOSURE_TYPES = ("Regulatory Event", "Civil Event", "Arbitration", "Financial", "Judgment / Lien", "Bond")
+
+REGISTRATION_RE = re.compile(
+    r"^(?P<name>.+?)\s+(?P<status>Approved|Pending|Terminated|Withdrawn|Suspended|Revoked|Restricted)"
+    r"\s+(?P<date>\d{2}/\d{2}/\d{4})$"
+)
+ADDRESS_LABELS = {"main office address": "main_office", "mailing address": "mailing"}
+CRD_FROM_NAME = re.compile(r"firm_(\d+)\.pdf$")
+
+
+def _pdf_reader(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("PDF extraction needs pypdf: pip install pypdf") from None
+    return PdfReader(path)
+
+
+def split_sections(lines):
+    """Group report lines under the section heading they follow"""
+    sections = {}
+    current = "cover"
+    for line in lines:
+        key = SECTION_HEADINGS.get(line.casefold())
+        if key:
+            current = key
+            continue
+        sections.setdefault(current, []).append(line)
+    return sections
+
+
+def parse_addresses(lines):
+    """The few lines after each 'Main Office Address' / 'Mailing Address' label"""
+    addresses = {}
+    for i, line in enumerate(lines):
+        key = ADDRESS_LABELS.get(line.rstrip(":").casefold())
+        if key and key not in addresses:
+            block = []
+            for nxt in lines[i + 1:i + 5]:
+                if nxt.rstrip(":").casefold() in ADDRESS_LABELS or nxt.endswith(":"):
+                    break
+                block.append(nxt)
+            addresses[key] = " ".join(block) or None
+    return addresses
+
+
+def parse_registrations(lines):
+    return [m.groupdict() for m in map(REGISTRATION_RE.match, lines) if m]
+
+
+def parse_disclosure_counts(lines):
+    """{'Regulatory Event': 12, ...} from the summary table, where the report lists them"""
+    counts = {}
+    for line in lines:
+        for kind in DISCLOSURE_TYPES:
+            m = re.match(rf"^{re.escape(kind)}s?\s+(\d+)", line)
+            if m:
+                counts.setdefault(kind, int(m.group(1)))
+    return counts
+
+
+def extract_report(path):
+    """One Detailed Report PDF -> one record. Runs in a worker process; never raises"""
+    start = time.time()
+    name = os.path.basename(path)
+    match = CRD_FROM_NAME.search(name)
+    record = {"crd": match.group(1) if match else None, "path": os.path.abspath(path)}
+    try:
+        reader = _pdf_reader(path)
+        pages = [page.extract_text() or "" for page in reader.pages]
+        lines = [line.strip() for text in pages for line in text.splitlines() if line.strip()]
+        sections = split_sections(lines)
+        record.update(
+            status="ok",
+            pages=len(pages),
+            chars=sum(len(text) for text in pages),
+            addresses=parse_addresses(sections.get("addresses", []) + sections.get("profile", [])),
+            registrations=parse_registrations(sections.get("registrations", [])),
+            disclosure_counts=parse_disclosure_counts(sections.get("summary", []) + sections.get("disclosures", [])),
+            sections={key: "\n".join(value) for key, value in sections.items()},
+        )
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["elapsed"] = round(time.time() - start, 3)
+    return record
+
+
+class ExtractionPipeline:
+    """Streams finished PDFs through a process pool, writing one JSON line per firm.
+
+    submit() returns right away, so a download loop can hand each report over the
+    moment it lands; at most `backlog` reports wait for a free worker at a time.
+    """
+
+    def __init__(self, output="reports.jsonl", workers=None, backlog=None):
+        # Fail here in the parent rather than once per report in the workers
+        try:
+            import pypdf  # noqa: F401
+        except ImportError:
+            raise ImportError("PDF extraction needs pypdf: pip install pypdf") from None
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        self.slots = threading.BoundedSemaphore(backlog or self.workers * 4)
+        self.lock = threading.Lock()
+        self.out = open(output, "a")
+        self.records = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, path):
+        self.slots.acquire()
+        future = self.executor.submit(extract_report, path)
+        future.add_done_callback(lambda f: self._write(f, path))
+        return future
+
+    def _write(self, future, path):
+        try:
+            record = future.result()
+        except Exception as e:  # worker process died
+            record = {"path": os.path.abspath(path), "status": "error", "error": f"{type(e).__name__}: {e}"}
+        with self.lock:
+            self.out.write(json.dumps(record) + "\n")
+            self.out.flush()
+            self.records += 1
+            self.failed += record["status"] != "ok"
+        self.slots.release()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.out.close()
+        debug_print(f"✅ Extracted {self.records - self.failed}/{self.records} reports", "SUCCESS")
+
+
+def extract_many(paths, output="reports.jsonl", workers=None):
+    with ExtractionPipeline(output, workers) as pipeline:
+        for path in paths:
+            pipeline.submit(path)
+    return pipeline.records
+
+
+if __name__ == "__main__":
+    # python extract.py downloads/ [more dirs or PDFs]  -> appends to reports.jsonl
+    if len(sys.argv) < 2:
+        print("Usage: python extract.py <download dir or PDF>...")
+        sys.exit(1)
+    pdfs = []
+    for arg in sys.argv[1:]:
+        pdfs += sorted(glob.glob(os.path.join(arg, "**", "firm_*.pdf"), recursive=True)) if os.path.isdir(arg) else [arg]
+    extract_many(pdfs)
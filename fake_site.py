@@ -0,0 +1,345 @@
+import re
+import json
+import time
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# A handful of firms; enough for name, CRD and no-result searches
+FIRMS = [
+    {"crd": "361", "name": "GOLDMAN SACHS & CO. LLC", "street": "200 West Street", "city": "New York",
+     "state": "NY", "postal_code": "10282"},
+    {"crd": "149777", "name": "MORGAN STANLEY", "street": "1585 Broadway", "city": "New York",
+     "state": "NY", "postal_code": "10036"},
+    {"crd": "79", "name": "J.P. MORGAN SECURITIES LLC", "street": "383 Madison Avenue", "city": "New York",
+     "state": "NY", "postal_code": "10179"},
+    {"crd": "7691", "name": "MERRILL LYNCH, PIERCE, FENNER & SMITH INCORPORATED", "street": "One Bryant Park",
+     "city": "New York", "state": "NY", "postal_code": "10036"},
+    {"crd": "5685", "name": "CHARLES SCHWAB & CO., INC.", "street": "3000 Schwab Way", "city": "Westlake",
+     "state": "TX", "postal_code": "76262"},
+]
+
+# One page for every route, like the Angular app: /, /search/results, /firm/summary/<crd>
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>BrokerCheck (local)</title>
+<style>
+  body { font-family: sans-serif; margin: 2em; }
+  .tabs { list-style: none; padding: 0; display: flex; gap: 1em; }
+  .tabs li { padding: .5em 1em; border: 1px solid #999; cursor: pointer; }
+  .tabs li.active { background: #ddd; }
+  #firm-form { display: none; }
+  investor-tools-big-name, investor-tools-firm-detail { display: block; }
+  .border-primary-60 { border: 1px solid #357; padding: 1em; margin: .5em 0; cursor: pointer; }
+  #cookie-banner { position: fixed; bottom: 0; left: 0; right: 0; padding: 1em; background: #eee; }
+</style>
+</head>
+<body>
+<div id="cookie-banner" style="display:none">
+  This site uses cookies. <button class="cookie-continue" id="cookie-continue">Continue</button>
+</div>
+<div id="app"></div>
+<script>
+(function() {
+  var API = "__API__", FILES = "__FILES__", app = document.getElementById("app");
+
+  if (document.cookie.indexOf("consent=1") === -1) {
+    var banner = document.getElementById("cookie-banner");
+    banner.style.display = "block";
+    document.getElementById("cookie-continue").addEventListener("click", function() {
+      document.cookie = "consent=1; path=/; max-age=31536000";
+      localStorage.setItem("bc.consent", "1");
+      banner.remove();
+    });
+  } else {
+    document.getElementById("cookie-banner").remove();
+  }
+
+  function esc(s) {
+    return String(s).replace(/[&<>"]/g, function(c) { return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]; });
+  }
+
+  function home(query) {
+    app.innerHTML =
+      '<ul class="tabs">' +
+      '  <li class="active" id="individual-tab"><div>Individual</div></li>' +
+      '  <li id="firm-tab"><div>Firm</div></li>' +
+      '</ul>' +
+      '<form id="individual-form"><input formcontrolname="individualName" placeholder="Individual Name or CRD#"></form>' +
+      '<form id="firm-form" onsubmit="return false">' +
+      '  <label>Firm</label>' +
+      '  <input formcontrolname="firmNameCrd" aria-label="firm-name" class="ng-untouched ng-pristine ng-valid"' +
+      '         placeholder="Firm Name or CRD/SEC#" autocomplete="off">' +
+      '  <button type="submit" aria-label="FirmSearch" class="search-button btn-accent">SEARCH</button>' +
+      '  <div id="form-error"></div>' +
+      '</form>' +
+      '<div id="results"></div>';
+
+    var firmTab = document.getElementById("firm-tab"), input = app.querySelector("[formcontrolname=firmNameCrd]");
+    firmTab.addEventListener("click", function() {
+      document.getElementById("individual-tab").classList.remove("active");
+      firmTab.classList.add("active");
+      document.getElementById("individual-form").style.display = "none";
+      document.getElementById("firm-form").style.display = "block";
+    });
+    input.addEventListener("input", function() {
+      input.classList.remove("ng-pristine");
+      input.classList.add("ng-dirty");
+    });
+    app.querySelector("[aria-label=FirmSearch]").addEventListener("click", function() {
+      var q = input.value.trim();
+      if (!q) {
+        document.getElementById("form-error").textContent = "Please enter a firm name or CRD";
+        return;
+      }
+      history.pushState({}, "", "/search/results?query=" + encodeURIComponent(q));
+      search(q);
+    });
+    if (query) {
+      firmTab.click();
+      input.value = query;
+      search(query);
+    }
+  }
+
+  function search(q) {
+    var results = document.getElementById("results");
+    results.innerHTML = "";
+    fetch(API + "/search/firm?query=" + encodeURIComponent(q) + "&start=0&nrows=12")
+      .then(function(r) { return r.json(); })
+      .then(function(data) {
+        var hits = data.hits.hits;
+        if (!hits.length) {
+          results.innerHTML = "<div>No results found</div>";
+          return;
+        }
+        results.innerHTML = '<div class="search-results"><div>' + hits.length + ' results found</div>' +
+          hits.map(function(h) {
+            var s = h._source;
+            return '<investor-tools-big-name data-crd="' + s.firm_source_id + '">' +
+                   '<div class="flex-col border-t-4 border-primary-60 bg-primary-0">' +
+                   '<span>' + esc(s.firm_name) + '</span>' +
+                   '<span class="crd-number">CRD#: ' + s.firm_source_id + '</span>' +
+                   '</div></investor-tools-big-name>';
+          }).join("") + '</div>';
+        Array.prototype.forEach.call(results.querySelectorAll("investor-tools-big-name"), function(card) {
+          card.addEventListener("click", function() {
+            location.href = "/firm/summary/" + card.getAttribute("data-crd");
+          });
+        });
+      });
+  }
+
+  function detail(crd) {
+    fetch(API + "/search/firm/" + crd)
+      .then(function(r) { return r.json(); })
+      .then(function(data) {
+        var firm = JSON.parse(data.hits.hits[0]._source.content);
+        app.innerHTML =
+          '<investor-tools-firm-detail class="firm-detail">' +
+          '  <div>Firm Profile</div>' +
+          '  <h1>' + esc(firm.name) + '</h1>' +
+          '  <div>CRD#: ' + crd + '</div>' +
+          '  <div>Registration: Approved</div>' +
+          '  <button class="detailed-report"><span>Detailed Report</span></button>' +
+          '</investor-tools-firm-detail>';
+        app.querySelector(".detailed-report").addEventListener("click", function() {
+          window.open(FILES + "/firm/firm_" + crd + ".pdf", "_blank");
+        });
+      });
+  }
+
+  var m = location.pathname.match(/^\\/firm\\/summary\\/(\\d+)/);
+  if (m) detail(m[1]);
+  else home(new URLSearchParams(location.search).get("query"));
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def report_pdf(firm):
+    """A small but valid one-page PDF laid out like the Detailed Report's headings"""
+    lines = [
+        "BrokerCheck Report", firm["name"], f"CRD# {firm['crd']}",
+        "Report Summary", "Regulatory Event 2", "Arbitration 1",
+        "Firm Profile", "Main Office Address:", firm["street"],
+        f"{firm['city']}, {firm['state']} {firm['postal_code']}", "Mailing Address:", firm["street"],
+        "Registrations", "SEC Approved 01/01/1940", "FINRA Approved 01/01/1940",
+        "Disclosure Events", "This firm has 3 disclosure events.",
+    ]
+    content = "BT /F1 10 Tf 50 780 Td 14 TL\n" + "".join(f"({_pdf_escape(l)}) Tj T*\n" for l in lines) + "ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def _source(firm):
+    return {
+        "firm_source_id": firm["crd"],
+        "firm_name": firm["name"],
+        "firm_other_names": [],
+        "firm_bc_scope": "ACTIVE",
+        "firm_branches_count": 1,
+        "firm_address_details": json.dumps({"officeAddress": {
+            "street1": firm["street"], "city": firm["city"], "state": firm["state"],
+            "postalCode": firm["postal_code"], "country": "United States",
+        }}),
+    }
+
+
+class FakeBrokerCheck:
+    """Local stand-in for brokercheck.finra.org, its search API and its report files.
+
+    Everything is served from one address. latency (seconds) delays every page,
+    api_latency and pdf_latency override it for API and report responses.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, api_latency=None, pdf_latency=None, firms=FIRMS):
+        self.latency = latency
+        self.api_latency = latency if api_latency is None else api_latency
+        self.pdf_latency = latency if pdf_latency is None else pdf_latency
+        self.firms = {f["crd"]: f for f in firms}
+        self.pdfs = {crd: report_pdf(f) for crd, f in self.firms.items()}
+        self.hits = {}
+        self.hits_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), FakeSiteHandler)
+        self.server.site = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, kind):
+        with self.hits_lock:
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+
+    def search(self, query):
+        query = (query or "").strip()
+        if query.isdigit():
+            return [f for f in self.firms.values() if f["crd"] == str(int(query))]
+        words = query.upper().split()
+        return [f for f in self.firms.values() if words and all(w in f["name"] for w in words)]
+
+    def page(self):
+        return PAGE.replace("__API__", self.url).replace("__FILES__", self.url).encode()
+
+
+class FakeSiteHandler(BaseHTTPRequestHandler):
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _json(self, payload):
+        self._send(200, json.dumps(payload).encode(), "application/json")
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        site = self.server.site
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = parse_qs(parsed.query)
+
+        detail = re.match(r"^/search/firm/(\d+)$", path)
+        report = re.match(r"^/firm/firm_(\d+)\.pdf$", path)
+        if path == "/search/firm":
+            site.count("search")
+            time.sleep(site.api_latency)
+            hits = [{"_source": _source(f)} for f in site.search(query.get("query", [""])[0])]
+            self._json({"hits": {"total": len(hits), "hits": hits}})
+        elif detail:
+            site.count("detail")
+            time.sleep(site.api_latency)
+            firm = site.firms.get(detail.group(1))
+            if not firm:
+                return self._send(404, b"{}", "application/json")
+            self._json({"hits": {"hits": [{"_source": {"content": json.dumps(dict(firm))}}]}})
+        elif report:
+            site.count("pdf")
+            time.sleep(site.pdf_latency)
+            body = site.pdfs.get(report.group(1))
+            if body is None:
+                return self._send(404, b"Not found", "text/plain")
+            etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            self._send(200, body, "application/pdf", {"ETag": etag})
+        elif path == "/" or path.startswith("/search/results") or path.startswith("/firm/summary/"):
+            site.count("page")
+            time.sleep(site.latency)
+            self._send(200, site.page())
+        else:
+            self._send(404, b"Not found", "text/plain")
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local fake BrokerCheck site")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--api-latency", type=float, default=None)
+    parser.add_argument("--pdf-latency", type=float, default=None)
+    args = parser.parse_args()
+
+    site = FakeBrokerCheck(args.host, args.port, args.latency, args.api_latency, args.pdf_latency)
+    print(f"Fake BrokerCheck on {site.url}")
+    print(f"  FINRA_BROKERCHECK_URL={site.url}/ FINRA_API_BASE_URL={site.url} FINRA_REPORT_BASE_URL={site.url}")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,46 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, files are still written atomically
+    fcntl = None
+
+
+def temp_path(path, suffix=".tmp"):
+    """A scratch name next to path, unique to this process and thread"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}{suffix}"
+
+
+def write_atomic(path, text, mode=0o666):
+    """Write-then-rename, so readers only ever see the old file or the complete new one"""
+    tmp_path = temp_path(path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path, data, mode=0o666, **dump_kwargs):
+    write_atomic(path, json.dumps(data, **dump_kwargs), mode)
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on <path>.lock across processes (a no-op where fcntl is missing)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".lock", "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,171 @@
+import sys
+import json
+import time
+import random
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from auth import TokenProvider
+from downloader import pooled_session
+from log import debug_print
+
+
+FIP_API_URL = "https://api.finra.org"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FipError(Exception):
+    pass
+
+
+def retry_after_seconds(response):
+    """Seconds asked for by a Retry-After header (delta or HTTP date), or None"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class FipClient:
+    """FINRA API Platform client: one pooled keep-alive session, bearer token
+    injected per request, backoff with jitter on 429/5xx, lazy paged results"""
+
+    def __init__(self, base_url=FIP_API_URL, tokens=None, pool_size=8, timeout=30,
+                 retries=5, backoff=0.5, max_backoff=30):
+        self.base_url = base_url.rstrip("/")
+        self.tokens = tokens or TokenProvider()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Retries are handled here (with jitter and token refresh), not by urllib3
+        self.session = pooled_session(pool_size=pool_size, retries=0)
+        self.session.headers.update({"Accept": "application/json"})
+        self.prefetcher = ThreadPoolExecutor(max_workers=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.prefetcher.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def _delay(self, attempt, response=None):
+        # Full jitter: anywhere between 0 and the exponential cap, so parallel
+        # callers don't retry in lockstep; the server's Retry-After is a floor
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if response is not None:
+            delay = max(delay, retry_after_seconds(response) or 0)
+        return delay
+
+    def request(self, method, path, **kwargs):
+        """Send a request, retrying connection errors and 429/5xx; returns the Response"""
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", self.timeout)
+        refreshed = False
+        attempt = 0
+        while True:
+            token = self.tokens.get_token()
+            headers = dict(kwargs.pop("headers", None) or {}, Authorization=f"Bearer {token}")
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.retries:
+                    raise FipError(f"{method} {url} failed: {e}") from e
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                kwargs["headers"] = headers
+                continue
+            kwargs["headers"] = headers
+
+            if response.status_code == 401 and not refreshed:
+                # Token revoked or expired early: drop it everywhere (unless someone
+                # already replaced it) and try once more
+                self.tokens.invalidate(token)
+                refreshed = True
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                delay = self._delay(attempt, response)
+                debug_print(f"FIP {response.status_code} on {url}, retrying in {delay:.1f}s", "WARNING")
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+            if response.status_code >= 400:
+                raise FipError(f"{method} {url} -> {response.status_code}: {response.text[:200]}")
+            return response
+
+    def get_json(self, path, **params):
+        return self.request("GET", path, params=params).json()
+
+    def paginate(self, path, params=None, body=None, page_size=1000, limit=None):
+        """Yield records from an offset/limit paged endpoint, one at a time.
+
+        Pages are fetched lazily; while the caller works through one page the
+        next is already being requested. A `body` switches to POST, as the FIP
+        dataset endpoints expect for filtered queries.
+        """
+        def fetch(offset):
+            if body is not None:
+                payload = dict(body, limit=page_size, offset=offset)
+                rows = self.request("POST", path, params=params, json=payload).json()
+            else:
+                query = dict(params or {}, limit=page_size, offset=offset)
+                rows = self.request("GET", path, params=query).json()
+            return rows if isinstance(rows, list) else rows.get("data") or []
+
+        offset = 0
+        yielded = 0
+        pending = self.prefetcher.submit(fetch, offset)
+        try:
+            while pending is not None:
+                rows = pending.result()
+                offset += page_size
+                # A short page is the last one; otherwise ask for the next right away
+                pending = self.prefetcher.submit(fetch, offset) if len(rows) == page_size else None
+                for row in rows:
+                    if limit is not None and yielded >= limit:
+                        return
+                    yield row
+                    yielded += 1
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def dataset(self, group, name, fields=None, filters=None, page_size=1000, limit=None):
+        """Lazily iterate a FIP dataset, e.g. dataset("firm", "...")"""
+        path = f"data/group/{group}/name/{name}"
+        body = None
+        if fields or filters:
+            body = {}
+            if fields:
+                body["fields"] = list(fields)
+            if filters:
+                body["compareFilters"] = [
+                    {"compareType": "EQUAL", "fieldName": k, "fieldValue": v} for k, v in filters.items()
+                ]
+        return self.paginate(path, body=body, page_size=page_size, limit=limit)
+
+
+if __name__ == "__main__":
+    # python fip_client.py <group> <dataset> [limit]
+    if len(sys.argv) < 3:
+        print("Usage: python fip_client.py <group> <dataset> [limit]")
+        sys.exit(1)
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    with FipClient() as client:
+        for record in client.dataset(sys.argv[1], sys.argv[2], limit=count):
+            print(json.dumps(record))
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+
+
+STORE_PATH = os.environ.get("FINRA_FIRM_STORE", "firms.sqlite")
+DEFAULT_TTL = float(os.environ.get("FINRA_STORE_TTL_HOURS", "24")) * 3600
+
+# Outcomes worth remembering; anything else (errors, failed clicks/downloads) is retried next time
+CACHEABLE = ("downloaded", "found", "no_results")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS firms (
+    crd TEXT PRIMARY KEY,
+    name TEXT,
+    name_norm TEXT,
+    detail_url TEXT,
+    location TEXT,
+    detail TEXT,
+    pdf_path TEXT,
+    fetched_at REAL NOT NULL,
+    detail_fetched_at REAL,
+    pdf_fetched_at REAL
+);
+CREATE INDEX IF NOT EXISTS firms_name_norm ON firms (name_norm);
+CREATE TABLE IF NOT EXISTS searches (
+    query TEXT PRIMARY KEY,
+    crd TEXT,
+    records TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def normalize_name(name):
+    """'Goldman Sachs & Co., LLC' -> 'goldman sachs and co llc': case, punctuation and spacing only.
+
+    Legal forms are kept: 'Morgan Stanley' and 'Morgan Stanley & Co. LLC' are different firms.
+    """
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (name or "").casefold().replace("&", " and ")).split())
+
+
+def query_key(query):
+    """Search box input -> store key: the CRD number, or the query itself trimmed and casefolded"""
+    query = str(query).strip()
+    return f"crd:{int(query)}" if query.isdigit() else f"name:{' '.join(query.casefold().split())}"
+
+
+class FirmStore:
+    """SQLite cache of lookup results, keyed by CRD and by the exact search query.
+
+    Holds the search results for each query, the firm's detail metadata and the
+    path of its downloaded report, each with the time it was fetched. get()
+    only answers while the record is younger than the TTL.
+    """
+
+    def __init__(self, path=STORE_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # One connection shared by this process's threads; other processes go through SQLite's locking
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _fresh(self, fetched_at, ttl):
+        return fetched_at is not None and time.time() - fetched_at < (self.ttl if ttl is None else ttl)
+
+    def _firm(self, crd):
+        return self.conn.execute("SELECT * FROM firms WHERE crd = ?", (str(crd),)).fetchone()
+
+    def get(self, firm, ttl=None, require_pdf=True):
+        """A lookup result for this name/CRD if one was stored within the TTL, else None.
+
+        With require_pdf a hit also needs its report still on disk.
+        """
+        key = query_key(firm)
+        with self.lock:
+            query = self.conn.execute("SELECT * FROM searches WHERE query = ?", (key,)).fetchone()
+            if query is not None and not self._fresh(query["fetched_at"], ttl):
+                query = None
+            if query is not None and query["crd"] is None:
+                return {"firm": firm, "status": "no_results", "cached": True, "fetched_at": query["fetched_at"]}
+
+            if query is not None:
+                row = self._firm(query["crd"])
+            elif key.startswith("crd:"):
+                row = self._firm(key[4:])
+            else:
+                # A query never searched before: answer from a stored firm only if its name is unambiguous
+                rows = self.conn.execute("SELECT * FROM firms WHERE name_norm = ? LIMIT 2",
+                                         (normalize_name(firm),)).fetchall()
+                row = rows[0] if len(rows) == 1 else None
+        if row is None or not self._fresh(row["fetched_at"], ttl):
+            return None
+
+        has_pdf = bool(row["pdf_path"]) and os.path.exists(row["pdf_path"])
+        if require_pdf and not has_pdf:
+            return None
+        result = {
+            "firm": firm,
+            "status": "downloaded" if has_pdf else "found",
+            "crd": row["crd"],
+            "name": row["name"],
+            "location": json.loads(row["location"]) if row["location"] else None,
+            "detail_url": row["detail_url"],
+            "cached": True,
+            "fetched_at": row["fetched_at"],
+        }
+        if has_pdf:
+            result["pdf_path"] = row["pdf_path"]
+        if query is not None and query["records"]:
+            result["records"] = json.loads(query["records"])
+        return result
+
+    def put(self, firm, result):
+        """Remember a lookup result (the dict returned by lookup_firm / BrokerCheckClient.lookup)"""
+        if result.get("cached") or result.get("status") not in CACHEABLE:
+            return
+        now = time.time()
+        crd = str(result["crd"]) if result.get("crd") else None
+        records = result.get("records")
+        with self.lock, self.conn:
+            if crd:
+                name = result.get("name")
+                location = json.dumps(result["location"]) if result.get("location") else None
+                pdf_path = result.get("pdf_path") if result["status"] == "downloaded" else None
+                self.conn.execute(
+                    """INSERT INTO firms (crd, name, name_norm, detail_url, location, pdf_path, fetched_at, pdf_fetched_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (crd) DO UPDATE SET
+                           name = COALESCE(excluded.name, name),
+                           name_norm = COALESCE(excluded.name_norm, name_norm),
+                           detail_url = COALESCE(excluded.detail_url, detail_url),
+                           location = COALESCE(excluded.location, location),
+                           pdf_path = COALESCE(excluded.pdf_path, pdf_path),
+                           pdf_fetched_at = COALESCE(excluded.pdf_fetched_at, pdf_fetched_at),
+                           fetched_at = excluded.fetched_at""",
+                    (crd, name, normalize_name(name) if name else None, result.get("detail_url"), location,
+                     pdf_path, now, now if pdf_path else None),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO searches (query, crd, records, fetched_at) VALUES (?, ?, ?, ?)",
+                (query_key(firm), crd, json.dumps(records) if records else None, now),
+            )
+
+    def get_detail(self, crd, ttl=None):
+        """Stored detail-page metadata for a CRD, if fetched within the TTL"""
+        with self.lock:
+            row = self._firm(crd)
+        if row is None or not row["detail"] or not self._fresh(row["detail_fetched_at"], ttl):
+            return None
+        return json.loads(row["detail"])
+
+    def put_detail(self, crd, detail):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                # fetched_at 0: a detail fetch alone doesn't make the search result fresh
+                """INSERT INTO firms (crd, detail, fetched_at, detail_fetched_at) VALUES (?, ?, 0, ?)
+                   ON CONFLICT (crd) DO UPDATE SET detail = excluded.detail,
+                                                   detail_fetched_at = excluded.detail_fetched_at""",
+                (str(crd), json.dumps(detail), now),
+            )
+
+    def split(self, firms, ttl=None, require_pdf=True):
+        """Answer what the store can: returns ({index: cached result}, [(index, firm) still to look up])"""
+        cached, misses = {}, []
+        for index, firm in enumerate(firms):
+            hit = self.get(firm, ttl, require_pdf)
+            if hit is not None:
+                cached[index] = hit
+            else:
+                misses.append((index, firm))
+        return cached, misses
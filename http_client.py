@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+
+from downloader import PdfDownloader, pooled_session, REPORT_BASE_URL
+from log import debug_print
+from network_capture import parse_firm_hits, API_BASE_URL
+from firm_store import FirmStore
+from report_store import archive_report
+
+
+BROKERCHECK_URL = os.environ.get("FINRA_BROKERCHECK_URL", "https://brokercheck.finra.org").rstrip("/")
+
+# Same query string the BrokerCheck page sends for a Firm search
+SEARCH_PARAMS = {
+    "hl": "true",
+    "includePrevious": "true",
+    "nrows": 12,
+    "start": 0,
+    "r": 25,
+    "sort": "score desc",
+    "wt": "json",
+}
+
+HEADERS = {
+    "Accept": "application/json, text/plain, */*",
+    "Origin": BROKERCHECK_URL,
+    "Referer": BROKERCHECK_URL + "/",
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+}
+
+
+class BrokerCheckClient:
+    """Firm search and report download over plain HTTP - no browser at all"""
+
+    def __init__(self, api_base_url=API_BASE_URL, report_base_url=REPORT_BASE_URL, site_url=BROKERCHECK_URL,
+                 download_dir="downloads", pool_size=8, timeout=15, downloader=None, store=None):
+        self.api_base_url = api_base_url.rstrip("/")
+        self.site_url = site_url.rstrip("/")
+        self.timeout = timeout
+        self.session = pooled_session(pool_size=pool_size)
+        self.session.headers.update(HEADERS)
+        self.downloader = downloader or PdfDownloader(download_dir, max_workers=pool_size, base_url=report_base_url)
+        self.store = store or FirmStore()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+        self.downloader.close()
+        self.store.close()
+
+    def search_firms(self, query, rows=12, start=0):
+        """Firm search by name or CRD; returns parse_firm_hits() records in the site's order"""
+        params = dict(SEARCH_PARAMS, query=str(query).strip(), nrows=rows, start=start)
+        response = self.session.get(f"{self.api_base_url}/search/firm", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_firm_hits(response.json())
+
+    def firm_detail(self, crd):
+        """The detail record the firm summary page is built from, as a dict (None if unknown)"""
+        cached = self.store.get_detail(crd)
+        if cached is not None:
+            return cached
+        response = self.session.get(f"{self.api_base_url}/search/firm/{int(crd)}", params=SEARCH_PARAMS,
+                                    timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        hits = (response.json().get("hits") or {}).get("hits") or []
+        if not hits:
+            return None
+        content = hits[0].get("_source", {}).get("content")
+        if isinstance(content, str):
+            try:
+                content = json.loads(content)
+            except ValueError:
+                pass
+        if content:
+            self.store.put_detail(crd, content)
+        return content
+
+    def detail_url(self, crd):
+        return f"{self.site_url}/firm/summary/{crd}"
+
+    def add_search_results(self, result, records):
+        """Fill a lookup result in from search_firms() records; the first one is the firm. False if none"""
+        if not records:
+            return False
+        record = records[0]
+        result.update(crd=record["crd"], name=record["name"], location=record["location"],
+                      detail_url=self.detail_url(record["crd"]), records=records, status="found")
+        return True
+
+    def add_report(self, result, report):
+        """Fill a lookup result in from a PdfDownloader.download() outcome, archiving a new report.
+
+        Blocking: archiving hashes (and may compress) the PDF.
+        """
+        result["pdf_path"] = report["path"]
+        result["status"] = "downloaded" if report["status"] == "downloaded" else "download_failed"
+        if result["status"] == "downloaded" and not report.get("unchanged"):
+            version = archive_report(result["crd"], report["path"], source="http")
+            if version:
+                result["sha256"] = version["sha256"]
+
+    def lookup(self, firm, download=True):
+        """Name/CRD -> first result -> report PDF, returning the same result shape as bot2.lookup_firm.
+
+        Answered from the FirmStore when it has a fresh record.
+        """
+        cached = self.store.get(firm, require_pdf=download)
+        if cached is not None:
+            return cached
+        start = time.time()
+        result = {"firm": firm, "status": "no_results"}
+        try:
+            if self.add_search_results(result, self.search_firms(firm)) and download:
+                self.add_report(result, self.downloader.download(result["crd"]))
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        result["elapsed"] = round(time.time() - start, 3)
+        self.store.put(firm, result)
+        return result
+
+
+if __name__ == "__main__":
+    # python http_client.py "Goldman Sachs" 7059 ...
+    with BrokerCheckClient() as client:
+        for name in sys.argv[1:]:
+            r = client.lookup(name)
+            debug_print(f"{name}: {r['status']} crd={r.get('crd')} pdf={r.get('pdf_path')}", "INFO")
@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import threading
+
+from fileutil import file_lock, write_json
+
+
+STATS_PATH = os.environ.get("FINRA_LOCATOR_STATS", "locator_stats.json")
+
+
+def strategy_key(by, selector, key=None):
+    """Stats key of a (by, selector) strategy; a third item overrides it, e.g. for selectors built per firm"""
+    return key or f"{by}={selector}"
+
+
+class LocatorRegistry:
+    """Remembers which locator strategy found each logical element.
+
+    The last winner is tried first and the rest are ordered by hit rate, so in
+    steady state an element is found with a single find_elements call. Timed
+    strategies (like the input-setting methods) can instead be ordered fastest
+    reliable first. Stats are persisted as JSON so the ordering carries over
+    between runs; save() merges this process's counts into the file, so
+    parallel workers add up instead of overwriting each other.
+    """
+
+    def __init__(self, path=STATS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.stats = self._load()
+        # Counts recorded since the last save(), in the same shape as stats
+        self.pending = {}
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Add the counts recorded since the last save to the file and reload the merged stats"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        try:
+            with file_lock(self.path):
+                stats = self._load()
+                for element, delta in pending.items():
+                    self._apply(stats, element, delta)
+                write_json(self.path, stats, indent=2, sort_keys=True)
+        except OSError:
+            with self.lock:
+                for element, delta in pending.items():
+                    self._apply(self.pending, element, delta)
+            return
+        with self.lock:
+            self.stats = stats
+            # Counts recorded while we were writing are still pending; keep them in view
+            for element, delta in self.pending.items():
+                self._apply(stats, element, delta)
+
+    @staticmethod
+    def _apply(stats, element, delta):
+        entry = stats.setdefault(element, {"winner": None, "strategies": {}})
+        if delta["winner"]:
+            entry["winner"] = delta["winner"]
+        for key, counts in delta["strategies"].items():
+            s = entry["strategies"].setdefault(key, {"hits": 0, "misses": 0})
+            s["hits"] += counts["hits"]
+            s["misses"] += counts["misses"]
+            for field in ("mean_seconds", "last_hit"):
+                if field in counts:
+                    s[field] = counts[field]
+
+    def hit_rate(self, element, key):
+        s = self.stats.get(element, {}).get("strategies", {}).get(key)
+        if not s:
+            return 0.5  # Untried strategies rank between proven and failing ones
+        return (s["hits"] + 1) / (s["hits"] + s["misses"] + 2)
+
+    def order(self, element, strategies):
+        """Winner first, then the rest by hit rate (original order breaks ties)"""
+        winner = self.stats.get(element, {}).get("winner")
+        return sorted(
+            strategies,
+            key=lambda s: (strategy_key(*s) != winner, -self.hit_rate(element, strategy_key(*s)))
+        )
+
+    def mean_seconds(self, element, key):
+        s = self.stats.get(element, {}).get("strategies", {}).get(key)
+        return s.get("mean_seconds") if s else None
+
+    def fastest_first(self, element, keys, min_rate=0.8):
+        """Reliable strategies fastest first, then untried ones, then the unreliable ones"""
+        def rank(key):
+            s = self.stats.get(element, {}).get("strategies", {}).get(key)
+            if not s:
+                return (1, 0.0)
+            rate = s["hits"] / (s["hits"] + s["misses"])
+            if rate < min_rate or s.get("mean_seconds") is None:
+                return (2, -rate)
+            return (0, s["mean_seconds"])
+        return sorted(keys, key=rank)
+
+    def record(self, element, key, hit, seconds=None):
+        """Count one attempt; it reaches the stats file on the next save()"""
+        with self.lock:
+            s = self.stats.get(element, {}).get("strategies", {}).get(key, {})
+            counts = {"hits": int(hit), "misses": int(not hit)}
+            if hit:
+                counts["last_hit"] = time.time()
+                if seconds is not None:
+                    # Moving average of how long a successful attempt takes
+                    mean = s.get("mean_seconds")
+                    counts["mean_seconds"] = round(seconds if mean is None else 0.7 * mean + 0.3 * seconds, 4)
+            delta = {"winner": key if hit else None, "strategies": {key: counts}}
+            self._apply(self.stats, element, delta)
+            self._apply(self.pending, element, delta)
+
+    def find(self, driver, element, strategies, predicate=None, log=None):
+        """Return (web_element, (by, selector)) for the first strategy with a matching element, or (None, None).
+
+        strategies are (by, selector) or (by, selector, stats_key) tuples. Attempts are
+        only counted in memory; call save() once the job is done.
+        """
+        predicate = predicate or (lambda e: e.is_displayed())
+        found = (None, None)
+        for strategy in self.order(element, strategies):
+            by, selector = strategy[:2]
+            key = strategy_key(*strategy)
+            try:
+                if log:
+                    log(f"Trying to find {element} with: {selector}")
+                match = next((e for e in driver.find_elements(by, selector) if predicate(e)), None)
+            except Exception as e:
+                if log:
+                    log(f"Error with {selector}: {e}")
+                match = None
+            self.record(element, key, match is not None)
+            if match is not None:
+                found = (match, (by, selector))
+                break
+        return found
+
+
+# Shared registry used by the bots
+LOCATORS = LocatorRegistry()
@@ -0,0 +1,7 @@
+import time
+
+
+def debug_print(msg, level="INFO"):
+    """Print with timestamp for debugging"""
+    timestamp = time.strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {msg}")
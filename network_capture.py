@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import base64
+from urllib.parse import urlparse
+
+from waits import record_wait
+
+
+API_BASE_URL = os.environ.get("FINRA_API_BASE_URL", "https://api.brokercheck.finra.org").rstrip("/")
+
+# The BrokerCheck page loads its search results from this JSON API
+SEARCH_URL_MARKERS = (urlparse(API_BASE_URL).netloc + "/search/firm",)
+
+
+def enable_network_capture(chrome_options):
+    """Turn on Chrome's performance log so Network.* events can be read back"""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def drain_performance_log(driver):
+    """Return (and clear) the buffered Network.* events"""
+    events = []
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method", "").startswith("Network."):
+            events.append(message)
+    return events
+
+
+def _address(source):
+    details = source.get("firm_address_details") or {}
+    if isinstance(details, str):
+        try:
+            details = json.loads(details)
+        except ValueError:
+            details = {}
+    office = details.get("officeAddress") or {}
+    return {
+        "street": " ".join(filter(None, [office.get("street1"), office.get("street2")])) or None,
+        "city": office.get("city"),
+        "state": office.get("state"),
+        "postal_code": office.get("postalCode"),
+        "country": office.get("country"),
+    }
+
+
+def parse_firm_hits(payload):
+    """Turn a BrokerCheck firm search response into [{"crd", "name", "location", ...}]"""
+    hits = (payload.get("hits") or {}).get("hits") or []
+    records = []
+    for hit in hits:
+        source = hit.get("_source") or {}
+        crd = source.get("firm_source_id")
+        if not crd:
+            continue
+        records.append({
+            "crd": str(crd),
+            "name": source.get("firm_name"),
+            "other_names": source.get("firm_other_names") or [],
+            "sec_number": source.get("firm_bd_full_sec_number") or source.get("firm_ia_full_sec_number"),
+            "scope": source.get("firm_bc_scope") or source.get("firm_ia_scope"),
+            "branch_count": source.get("firm_branches_count"),
+            "location": _address(source),
+        })
+    return records
+
+
+def wait_for_search_response(driver, timeout=30, markers=SEARCH_URL_MARKERS, poll=0.1):
+    """Wait for the firm search API response and return its parsed records.
+
+    Call drain_performance_log() before triggering the search so older
+    responses are not picked up. Returns None if no response arrived in time.
+    """
+    start = time.perf_counter()
+    pending = {}
+    records = None
+    while time.perf_counter() - start < timeout and records is None:
+        for event in drain_performance_log(driver):
+            params = event.get("params", {})
+            if event["method"] == "Network.responseReceived":
+                url = params.get("response", {}).get("url", "")
+                if any(m in url for m in markers) and params.get("response", {}).get("status") == 200:
+                    pending[params["requestId"]] = url
+            elif event["method"] == "Network.loadingFinished" and params.get("requestId") in pending:
+                body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+                text = body.get("body", "")
+                if body.get("base64Encoded"):
+                    text = base64.b64decode(text).decode("utf-8", "replace")
+                try:
+                    records = parse_firm_hits(json.loads(text))
+                except ValueError:
+                    continue
+                break
+        if records is None:
+            time.sleep(poll)
+    elapsed = time.perf_counter() - start
+    record_wait("search response (network)", elapsed, records is not None)
+    return records
@@ -0,0 +1,142 @@
+import sys
+import time
+import asyncio
+import functools
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from log import debug_print
+from http_client import BrokerCheckClient
+
+
+class TokenBucket:
+    """Global request rate limit: `rate` tokens per second, bursts of up to `burst`"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Orchestrator:
+    """Runs HTTP searches and PDF downloads concurrently from one event loop.
+
+    Every request takes a token from a shared TokenBucket and a slot from its
+    host's semaphore; the blocking requests calls run on a bounded thread pool.
+    """
+
+    def __init__(self, client=None, rate=5, burst=10, concurrency=32, per_host=8, download=True):
+        self.client = client or BrokerCheckClient(pool_size=per_host)
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.download = download
+        self.host_limits = {}
+        self.executor = ThreadPoolExecutor(max_workers=min(concurrency, per_host * 2))
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self.host_limits[host]
+
+    async def _blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _call(self, url, func, *args):
+        await self.bucket.acquire()
+        async with self._host_limit(url):
+            return await self._blocking(func, *args)
+
+    async def lookup(self, firm):
+        """BrokerCheckClient.lookup() with rate-limited requests; store access and archiving stay off the event loop"""
+        client, store = self.client, self.client.store
+        cached = await self._blocking(store.get, firm, require_pdf=self.download)
+        if cached is not None:
+            return cached
+        start = time.time()
+        result = {"firm": firm, "status": "no_results"}
+        try:
+            records = await self._call(client.api_base_url, client.search_firms, firm)
+            if client.add_search_results(result, records) and self.download:
+                downloader = client.downloader
+                report = await self._call(downloader.base_url, downloader.download, result["crd"])
+                await self._blocking(client.add_report, result, report)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        result["elapsed"] = round(time.time() - start, 3)
+        await self._blocking(store.put, firm, result)
+        return result
+
+    async def run(self, firms):
+        """Look up every firm with at most `concurrency` in flight; results keep input order"""
+        firms = list(firms)
+        results = [None] * len(firms)
+        jobs = asyncio.Queue()
+        for item in enumerate(firms):
+            jobs.put_nowait(item)
+
+        done = 0
+
+        async def worker():
+            nonlocal done
+            while True:
+                try:
+                    index, firm = jobs.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results[index] = await self.lookup(firm)
+                done += 1
+                if done % 100 == 0 or done == len(firms):
+                    debug_print(f"[{done}/{len(firms)}] lookups finished", "INFO")
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(firms)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # On cancellation stop every worker; requests already in a thread finish on their own
+            for w in workers:
+                w.cancel()
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
+
+
+def run_lookups(firms, **kwargs):
+    """Blocking entry point: returns one result per firm. Ctrl+C cancels whatever is still queued"""
+    orchestrator = Orchestrator(**kwargs)
+    try:
+        return asyncio.run(orchestrator.run(firms))
+    finally:
+        orchestrator.close()
+
+
+if __name__ == "__main__":
+    # python orchestrator.py firms.txt [requests per second]
+    if len(sys.argv) < 2:
+        print("Usage: python orchestrator.py <firms file, one name or CRD per line> [rate]")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        firm_list = [line.strip() for line in f if line.strip()]
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    results = run_lookups(firm_list, rate=rate)
+    ok = sum(1 for r in results if r["status"] == "downloaded")
+    debug_print(f"✅ {ok}/{len(results)} firms downloaded", "SUCCESS")
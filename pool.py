@@ -0,0 +1,145 @@
+import os
+import sys
+import queue
+import multiprocessing
+
+from bot2 import start_browser, open_search_form, return_to_search_form, lookup_firm
+from downloader import PdfDownloader
+from driver_resolver import resolve_chromedriver
+from firm_store import FirmStore
+from log import debug_print
+
+
+def _worker(worker_id, jobs, results, download_root, profile, http_download, capture_network):
+    """Worker process: own Chrome + download dir, pulls (index, firm) jobs until it gets None"""
+    download_dir = os.path.abspath(os.path.join(download_root, f"worker-{worker_id}"))
+    os.makedirs(download_dir, exist_ok=True)
+    driver = wait = None
+    # Chrome needs a directory of its own, but HTTP downloads all go to one shared directory:
+    # a CRD lands on a different worker from run to run and must still find its ETag there.
+    # Temp files are per pid/thread and renamed into place, so workers never clash.
+    report_dir = os.path.abspath(os.path.join(download_root, "reports"))
+    downloader = PdfDownloader(report_dir, max_workers=1) if http_download else None
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        index, firm = job
+
+        try:
+            if driver is None:
+                driver, wait = start_browser(download_dir=download_dir, headless=True, profile=profile,
+                                             capture_network=capture_network)
+                form_ready = open_search_form(driver, wait)
+            else:
+                form_ready = return_to_search_form(driver, wait)
+
+            if form_ready:
+                result = lookup_firm(driver, wait, firm, downloader)
+            else:
+                result = {"firm": firm, "status": "error", "error": "Firm search form not available"}
+        except Exception as e:
+            debug_print(f"🔥 Worker {worker_id} failed on {firm}: {e}", "ERROR")
+            result = {"firm": firm, "status": "error", "error": str(e)}
+            # Start the next job from a fresh browser rather than a half-broken one
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                driver = wait = None
+
+        result["worker"] = worker_id
+        result["download_dir"] = report_dir if downloader else download_dir
+        results.put((index, result))
+
+    if driver is not None:
+        driver.quit()
+    if downloader is not None:
+        downloader.close()
+
+
+def run_pool(firms, workers=4, download_root="downloads", profile="lean", http_download=False,
+             capture_network=False, store=None, extract=None, reextract=False):
+    """Look up firms with N headless browser worker processes sharing one job queue.
+
+    Workers use the lean browser profile by default; pass profile="default" to load every asset.
+    With http_download the PDFs are fetched by CRD over HTTP instead of through the browser,
+    and capture_network reads search results from the API responses instead of the DOM.
+    Firms already in the FirmStore (within its TTL) never reach a worker. Pass an
+    extract.ExtractionPipeline as `extract` to parse each report as soon as it is downloaded;
+    only new reports are sent, unless reextract also asks for cached and unchanged ones.
+    Returns one result dict per firm, in input order.
+    """
+    firms = list(firms)
+    store = store or FirmStore()
+    collected, misses = store.split(firms, require_pdf=True)
+    if collected:
+        debug_print(f"📦 {len(collected)}/{len(firms)} firms answered from the local store", "INFO")
+    if extract is not None and reextract:
+        for result in collected.values():
+            extract.submit(result["pdf_path"])
+    if not misses:
+        return [collected[index] for index in range(len(firms))]
+    workers = max(1, min(workers, len(misses)))
+    ctx = multiprocessing.get_context("spawn")
+    jobs = ctx.Queue()
+    results = ctx.Queue()
+
+    for index, firm in misses:
+        jobs.put((index, firm))
+    for _ in range(workers):
+        jobs.put(None)
+
+    # Resolve chromedriver once here so every worker starts from the local record
+    resolve_chromedriver()
+
+    debug_print(f"Starting {workers} browser workers for {len(misses)} firms", "INFO")
+    procs = [
+        ctx.Process(target=_worker, args=(i, jobs, results, download_root, profile, http_download, capture_network))
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    while len(collected) < len(firms):
+        try:
+            index, result = results.get(timeout=5)
+        except queue.Empty:
+            # Stop waiting if every worker has exited (e.g. crashed) without reporting
+            if not any(p.is_alive() for p in procs):
+                break
+            continue
+        collected[index] = result
+        store.put(firms[index], result)
+        # reports.jsonl is append-only: a 304 or cached report was extracted on an earlier run
+        new_report = not result.get("cached") and not result.get("report_unchanged")
+        if extract is not None and result["status"] == "downloaded" and result.get("pdf_path") \
+                and (new_report or reextract):
+            extract.submit(result["pdf_path"])
+        debug_print(f"[{len(collected)}/{len(firms)}] {result['firm']}: {result['status']}", "INFO")
+
+    for p in procs:
+        p.join()
+
+    output = []
+    for index, firm in enumerate(firms):
+        output.append(collected.get(index, {"firm": firm, "status": "error", "error": "worker exited before reporting"}))
+
+    ok = sum(1 for r in output if r["status"] == "downloaded")
+    debug_print(f"✅ Pool completed: {ok}/{len(output)} firms downloaded", "SUCCESS")
+    return output
+
+
+if __name__ == "__main__":
+    # python pool.py firms.txt [workers]
+    if len(sys.argv) < 2:
+        print("Usage: python pool.py <firms file, one name or CRD per line> [workers]")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        firm_list = [line.strip() for line in f if line.strip()]
+    worker_count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    failed = [r for r in run_pool(firm_list, workers=worker_count) if r["status"] != "downloaded"]
+    for r in failed:
+        debug_print(f"{r['firm']}: {r['status']} {r.get('error', '')}", "WARNING")
@@ -0,0 +1,58 @@
+# Browser profiles for start_browser().
+#
+# "default" is the visible, maximized window the scripts were written against.
+# "lean" is headless, drops images/fonts/analytics/trackers and caps memory so
+# more workers fit on one box. The Angular bundles, XHR/API calls and the PDF
+# host are never blocked.
+
+PROFILES = ("default", "lean")
+
+DEFAULT_WINDOW_SIZE = (1366, 900)
+
+# Patterns for CDP Network.setBlockedURLs ("*" is the only wildcard)
+LEAN_BLOCKED_URLS = [
+    # Images and fonts
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*use.typekit.net*",
+    # Analytics, tag managers and trackers
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*connect.facebook.com*", "*linkedin.com/px*", "*ads.linkedin.com*",
+    "*hotjar.com*", "*newrelic.com*", "*nr-data.net*", "*optimizely.com*",
+    "*adobedtm.com*", "*demdex.net*", "*omtrdc.net*", "*2o7.net*",
+    "*qualtrics.com*", "*siteimproveanalytics*", "*clarity.ms*",
+]
+
+LEAN_ARGS = [
+    "--headless=new",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-dev-shm-usage",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--no-first-run",
+    "--mute-audio",
+    "--blink-settings=imagesEnabled=false",
+    # Memory limits: one renderer per site and a capped V8 heap
+    "--renderer-process-limit=2",
+    "--disk-cache-size=33554432",
+]
+
+
+def apply_lean_options(chrome_options, prefs, window_size=DEFAULT_WINDOW_SIZE, js_heap_mb=512):
+    """Add the lean profile's flags and prefs to a ChromeOptions / prefs dict pair"""
+    for arg in LEAN_ARGS:
+        chrome_options.add_argument(arg)
+    chrome_options.add_argument(f"--window-size={window_size[0]},{window_size[1]}")
+    chrome_options.add_argument(f"--js-flags=--max-old-space-size={js_heap_mb}")
+    prefs["profile.managed_default_content_settings.images"] = 2
+    prefs["profile.managed_default_content_settings.notifications"] = 2
+
+
+def block_nonessential(driver, patterns=LEAN_BLOCKED_URLS):
+    """Drop requests matching patterns for the rest of this driver's life"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
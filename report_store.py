@@ -0,0 +1,203 @@
+import os
+import sys
+import mmap
+import time
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:  # optional: objects are then stored uncompressed
+    zstandard = None
+
+from fileutil import temp_path
+from log import debug_print
+
+
+STORE_DIR = os.environ.get("FINRA_REPORT_STORE", "report_store")
+CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    crd TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    source TEXT,
+    PRIMARY KEY (crd, sha256)
+);
+CREATE INDEX IF NOT EXISTS versions_by_crd ON versions (crd, last_seen);
+"""
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReportStore:
+    """Report PDFs stored once per distinct content, under their SHA-256.
+
+    objects/ab/<sha256>[.zst] holds the bytes (zstd-compressed when zstandard is
+    installed); index.sqlite maps each CRD to the versions seen for it. Adding a
+    report identical to one already stored only bumps its last_seen time.
+    """
+
+    def __init__(self, root=STORE_DIR, compress=None, level=10):
+        self.root = root
+        self.compress = (zstandard is not None) if compress is None else compress
+        if self.compress and zstandard is None:
+            raise ImportError("zstd compression needs zstandard: pip install zstandard")
+        self.level = level
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def object_path(self, sha256, codec):
+        suffix = ".zst" if codec == "zstd" else ""
+        return os.path.join(self.root, "objects", sha256[:2], sha256 + suffix)
+
+    def _find_object(self, sha256):
+        for codec in ("zstd", "raw"):
+            if os.path.exists(self.object_path(sha256, codec)):
+                return codec
+        return None
+
+    def _write_object(self, path, sha256):
+        codec = "zstd" if self.compress else "raw"
+        final_path = self.object_path(sha256, codec)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        tmp_path = temp_path(final_path)
+        try:
+            with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+                if codec == "zstd":
+                    zstandard.ZstdCompressor(level=self.level).copy_stream(src, dst)
+                else:
+                    for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                        dst.write(chunk)
+            # Same content always has the same name, so a concurrent writer is harmless
+            os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return codec, os.path.getsize(final_path)
+
+    def add(self, crd, path, source=None):
+        """Store a downloaded report. Returns {"sha256", "size", "stored_size", "new_object", "new_version"}"""
+        sha256 = file_sha256(path)
+        size = os.path.getsize(path)
+        codec = self._find_object(sha256)
+        new_object = codec is None
+        if new_object:
+            codec, stored_size = self._write_object(path, sha256)
+        else:
+            stored_size = os.path.getsize(self.object_path(sha256, codec))
+
+        now = time.time()
+        with self.lock, self.conn:
+            new_version = self.conn.execute(
+                "SELECT 1 FROM versions WHERE crd = ? AND sha256 = ?", (str(crd), sha256)
+            ).fetchone() is None
+            self.conn.execute(
+                """INSERT INTO versions (crd, sha256, size, stored_size, codec, first_seen, last_seen, source)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (crd, sha256) DO UPDATE SET last_seen = excluded.last_seen""",
+                (str(crd), sha256, size, stored_size, codec, now, now, source),
+            )
+        return {"sha256": sha256, "size": size, "stored_size": stored_size,
+                "new_object": new_object, "new_version": new_version}
+
+    def versions(self, crd):
+        """Every distinct report seen for a CRD, most recently seen first (A -> B -> A puts A back on top)"""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM versions WHERE crd = ? ORDER BY last_seen DESC",
+                                     (str(crd),)).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest(self, crd):
+        versions = self.versions(crd)
+        return versions[0] if versions else None
+
+    @contextmanager
+    def open(self, sha256):
+        """Yield a report's bytes: a read-only mmap of the object, decompressed if needed"""
+        codec = self._find_object(sha256)
+        if codec is None:
+            raise FileNotFoundError(f"No stored report {sha256}")
+        with open(self.object_path(sha256, codec), "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if codec == "zstd":
+                yield zstandard.ZstdDecompressor().decompressobj().decompress(mapped)
+            else:
+                yield mapped
+
+    def read(self, sha256):
+        with self.open(sha256) as data:
+            return bytes(data)
+
+    def stats(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(DISTINCT crd) AS firms, COUNT(*) AS versions FROM versions"
+            ).fetchone()
+        objects = stored = 0
+        for dirpath, _, files in os.walk(os.path.join(self.root, "objects")):
+            for name in files:
+                if not name.endswith(".tmp"):
+                    objects += 1
+                    stored += os.path.getsize(os.path.join(dirpath, name))
+        return {"firms": row["firms"], "versions": row["versions"], "objects": objects, "stored_bytes": stored}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def archive_report(crd, path, source=None, root=STORE_DIR):
+    """Add a freshly downloaded report to this process's ReportStore; never raises.
+
+    Set FINRA_REPORT_STORE to an empty string to turn archiving off.
+    """
+    if not root or not crd or not path:
+        return None
+    try:
+        with _stores_lock:
+            if root not in _stores:
+                _stores[root] = ReportStore(root)
+            store = _stores[root]
+        return store.add(crd, path, source)
+    except (OSError, sqlite3.Error) as e:
+        debug_print(f"⚠️ Could not archive report for CRD {crd}: {e}", "WARNING")
+        return None
+
+
+if __name__ == "__main__":
+    # python report_store.py downloads/firm_361.pdf ...   (archive)
+    # python report_store.py                               (summary)
+    with ReportStore() as reports:
+        for pdf in sys.argv[1:]:
+            digits = "".join(c for c in os.path.basename(pdf) if c.isdigit())
+            print(pdf, reports.add(digits, pdf, source="cli"))
+        print(reports.stats())
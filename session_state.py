@@ -0,0 +1,80 @@
+import os
+import json
+import time
+
+from fileutil import write_json
+
+
+STATE_PATH = os.environ.get("FINRA_SESSION_STATE", "session_state.json")
+MAX_AGE_DAYS = 30
+
+# Fields accepted by CDP Network.setCookies (CookieParam)
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+
+def capture_session_state(driver, path=STATE_PATH):
+    """Save cookies (all domains) and the page's localStorage once cookie consent is done"""
+    cookies = driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+    local_storage = driver.execute_script("""
+        var items = {};
+        for (var i = 0; i < localStorage.length; i++) {
+            var key = localStorage.key(i);
+            items[key] = localStorage.getItem(key);
+        }
+        return items;
+    """)
+    state = {
+        "origin": driver.execute_script("return location.origin;"),
+        "cookies": cookies,
+        "local_storage": local_storage,
+        "consent": True,
+        "saved_at": time.time(),
+    }
+    # The daemon opens every slot's search form at once; the temp file is per thread
+    write_json(path, state, indent=2)
+    return state
+
+
+def load_session_state(path=STATE_PATH, max_age_days=MAX_AGE_DAYS):
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - state.get("saved_at", 0) > max_age_days * 86400:
+        return None
+    return state
+
+
+def restore_session_state(driver, path=STATE_PATH, max_age_days=MAX_AGE_DAYS):
+    """Inject saved cookies and localStorage before the first navigation.
+
+    Returns True if a consented state was restored, so the consent UI can be skipped.
+    """
+    state = load_session_state(path, max_age_days)
+    if not state or not state.get("consent"):
+        return False
+
+    now = time.time()
+    cookies = []
+    for cookie in state.get("cookies", []):
+        # Session cookies (expires -1) are still worth carrying over; expired ones are not
+        if cookie.get("expires", -1) not in (-1, None) and cookie["expires"] < now:
+            continue
+        cookies.append({k: cookie[k] for k in COOKIE_FIELDS if k in cookie})
+    if cookies:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+
+    if state.get("local_storage"):
+        # Runs before the app's own scripts on every document from the saved origin,
+        # filling in only keys the page doesn't already have
+        script = """
+            (function(origin, items) {
+                if (location.origin !== origin) return;
+                Object.keys(items).forEach(function(key) {
+                    if (localStorage.getItem(key) === null) localStorage.setItem(key, items[key]);
+                });
+            })(%s, %s);
+        """ % (json.dumps(state["origin"]), json.dumps(state["local_storage"]))
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})
+    return True
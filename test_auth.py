@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from auth import TokenProvider, TokenError
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class TokenServer:
+    """OAuth token endpoint that hands out token-1, token-2, ... after `delay` seconds"""
+
+    def __init__(self, delay=0.2, expires_in=1800, status=200):
+        self.delay = delay
+        self.expires_in = expires_in
+        self.status = status
+        self.posts = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                with server.lock:
+                    server.posts += 1
+                    token = f"token-{server.posts}"
+                time.sleep(server.delay)
+                body = json.dumps({"access_token": token, "expires_in": server.expires_in}).encode()
+                self.send_response(server.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/token"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = TokenServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache" / "token.json")
+
+
+def provider(server, cache_path, **kwargs):
+    return TokenProvider("client", "secret", token_url=server.url, cache_path=cache_path, **kwargs)
+
+
+def test_concurrent_callers_share_one_refresh(server, cache_path):
+    tokens = provider(server, cache_path)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tokens.get_token())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["token-1"] * 8
+    assert server.posts == 1
+
+
+def test_late_401s_for_the_same_token_refresh_once(server, cache_path):
+    tokens = provider(server, cache_path)
+    other = provider(server, cache_path)
+    stale = tokens.get_token()
+    assert other.get_token() == stale
+    results = []
+
+    def rejected(delay):
+        # Requests still in flight with the old token get their 401s one after another
+        time.sleep(delay)
+        tokens.invalidate(stale)
+        results.append(tokens.get_token())
+
+    threads = [threading.Thread(target=rejected, args=(i * 0.05,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Another process that still holds the old token doesn't drop the new one either
+    other.invalidate(stale)
+    assert results == ["token-2"] * 8
+    assert other.get_token() == "token-2"
+    assert server.posts == 2
+
+
+def test_cache_file_is_private_and_reused(server, cache_path):
+    assert provider(server, cache_path).get_token() == "token-1"
+    assert oct(os.stat(cache_path).st_mode & 0o777) == "0o600"
+    # A new provider (a restarted worker) starts from the file, not the endpoint
+    assert provider(server, cache_path).get_token() == "token-1"
+    assert server.posts == 1
+
+
+def test_processes_share_the_cached_token(server, cache_path):
+    script = (
+        "import sys; from auth import TokenProvider; "
+        "print(TokenProvider('client', 'secret', token_url=sys.argv[1], cache_path=sys.argv[2]).get_token())"
+    )
+    workers = [subprocess.Popen([sys.executable, "-c", script, server.url, cache_path], cwd=ROOT,
+                                stdout=subprocess.PIPE, text=True) for _ in range(4)]
+    outputs = [w.communicate(timeout=30)[0].strip() for w in workers]
+    assert outputs == ["token-1"] * 4
+    assert server.posts == 1
+
+
+def test_token_near_expiry_is_refreshed(server, cache_path):
+    server.expires_in = 30
+    tokens = provider(server, cache_path, refresh_margin=60)
+    assert tokens.get_token() == "token-1"
+    # Still inside the refresh margin, so the next call fetches again
+    assert tokens.get_token() == "token-2"
+    assert server.posts == 2
+
+
+def test_invalidate_forces_a_new_token(server, cache_path):
+    tokens = provider(server, cache_path)
+    other = provider(server, cache_path)
+    assert tokens.get_token() == "token-1"
+    tokens.invalidate()
+    assert other.get_token() == "token-2"
+    assert tokens.get_token() == "token-2"
+    assert server.posts == 2
+
+
+def test_endpoint_error_raises_token_error(server, cache_path):
+    server.status = 401
+    with pytest.raises(TokenError):
+        provider(server, cache_path).get_token()
+    assert not os.path.exists(cache_path)
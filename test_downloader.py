@@ -0,0 +1,133 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from downloader import PdfDownloader
+from fake_site import FakeBrokerCheck
+
+
+PDF = b"%PDF-1.4\n" + b"0" * 4096 + b"\n%%EOF\n"
+
+
+class ScriptedServer:
+    """Answers GETs from a list of (status, body, drop) steps, then keeps repeating the last one.
+
+    drop=True promises the whole body in Content-Length but closes after half of it.
+    """
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body, drop = server.steps[min(server.requests, len(server.steps) - 1)]
+                server.requests += 1
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body[:len(body) // 2] if drop else body)
+                if drop:
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def scripted():
+    servers = []
+
+    def start(*steps):
+        servers.append(ScriptedServer(steps))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def leftovers(directory):
+    return [name for name in os.listdir(directory) if name.endswith((".part", ".tmp"))]
+
+
+def test_unchanged_report_is_kept_on_304(tmp_path):
+    with FakeBrokerCheck() as site, PdfDownloader(tmp_path, max_workers=1, base_url=site.url) as downloader:
+        first = downloader.download(361)
+        with open(first["path"], "rb") as f:
+            original = f.read()
+        second = downloader.download(361)
+
+        assert first["status"] == "downloaded" and not first["unchanged"]
+        assert second["status"] == "downloaded" and second["unchanged"]
+        assert second["bytes"] == 0
+        assert site.hits["pdf"] == 2
+    with open(second["path"], "rb") as f:
+        assert f.read() == original
+
+
+def test_missing_report_is_not_found(tmp_path):
+    with FakeBrokerCheck() as site, PdfDownloader(tmp_path, max_workers=1, base_url=site.url) as downloader:
+        result = downloader.download(999999)
+    assert result["status"] == "not_found"
+    assert os.listdir(tmp_path) == []
+
+
+def test_html_instead_of_pdf_is_an_error(tmp_path, scripted):
+    server = scripted((200, b"<html>Access denied</html>", False))
+    with PdfDownloader(tmp_path, max_workers=1, base_url=server.url) as downloader:
+        result = downloader.download(361)
+    assert result["status"] == "error"
+    assert "not a PDF" in result["error"]
+    assert not os.path.exists(downloader.path_for(361))
+    assert leftovers(tmp_path) == []
+
+
+def test_html_does_not_replace_a_good_copy(tmp_path, scripted):
+    good = scripted((200, PDF, False))
+    with PdfDownloader(tmp_path, max_workers=1, base_url=good.url) as downloader:
+        assert downloader.download(361)["status"] == "downloaded"
+    bad = scripted((200, b"<html>Access denied</html>", False))
+    with PdfDownloader(tmp_path, max_workers=1, base_url=bad.url) as downloader:
+        assert downloader.download(361)["status"] == "error"
+        with open(downloader.path_for(361), "rb") as f:
+            assert f.read() == PDF
+
+
+def test_dropped_connection_is_retried(tmp_path, scripted):
+    server = scripted((200, PDF, True), (200, PDF, False))
+    with PdfDownloader(tmp_path, max_workers=1, backoff=0, base_url=server.url) as downloader:
+        result = downloader.download(361)
+    assert result["status"] == "downloaded"
+    assert result["bytes"] == len(PDF)
+    assert server.requests == 2
+    assert leftovers(tmp_path) == []
+
+
+def test_server_errors_are_retried(tmp_path, scripted):
+    server = scripted((503, b"busy", False), (200, PDF, False))
+    with PdfDownloader(tmp_path, max_workers=1, backoff=0, base_url=server.url) as downloader:
+        result = downloader.download(361)
+    assert result["status"] == "downloaded"
+    assert server.requests == 2
+
+
+def test_gives_up_after_the_retries(tmp_path, scripted):
+    server = scripted((200, PDF, True))
+    with PdfDownloader(tmp_path, max_workers=1, retries=2, backoff=0, base_url=server.url) as downloader:
+        result = downloader.download(361)
+    assert result["status"] == "error"
+    assert server.requests == 3
+    assert not os.path.exists(downloader.path_for(361))
+    assert leftovers(tmp_path) == []
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from fake_site import FakeBrokerCheck
+from firm_store import FirmStore
+from http_client import BrokerCheckClient
+
+
+@pytest.fixture
+def site():
+    with FakeBrokerCheck() as site:
+        yield site
+
+
+@pytest.fixture
+def client(site, tmp_path, monkeypatch):
+    # archive_report() writes to ./report_store
+    monkeypatch.chdir(tmp_path)
+    client = BrokerCheckClient(api_base_url=site.url, report_base_url=site.url, site_url=site.url,
+                               download_dir=str(tmp_path / "downloads"), pool_size=2,
+                               store=FirmStore(str(tmp_path / "firms.sqlite")))
+    yield client
+    client.close()
+
+
+def test_search_by_name_and_crd(client):
+    by_name = client.search_firms("Goldman Sachs")
+    by_crd = client.search_firms(" 361 ")
+    assert [r["crd"] for r in by_name] == ["361"]
+    assert by_crd[0]["name"] == "GOLDMAN SACHS & CO. LLC"
+    assert client.search_firms("No Such Firm") == []
+
+
+def test_lookup_downloads_and_archives_the_report(client, site):
+    result = client.lookup("Goldman Sachs")
+    assert result["status"] == "downloaded"
+    assert result["crd"] == "361"
+    assert result["detail_url"] == f"{site.url}/firm/summary/361"
+    assert os.path.exists(result["pdf_path"])
+    assert len(result["sha256"]) == 64
+    assert site.hits == {"search": 1, "pdf": 1}
+
+
+def test_lookup_is_answered_from_the_store(client, site):
+    client.lookup("Goldman Sachs")
+    again = client.lookup("  goldman sachs")
+    assert again["cached"] and again["crd"] == "361"
+    assert site.hits == {"search": 1, "pdf": 1}
+
+
+def test_lookup_without_results(client, site):
+    assert client.lookup("No Such Firm")["status"] == "no_results"
+    assert client.lookup("No Such Firm")["cached"]
+    assert site.hits == {"search": 1}
+
+
+def test_lookup_without_download(client, site):
+    result = client.lookup("149777", download=False)
+    assert result["status"] == "found"
+    assert "pdf_path" not in result
+    assert "pdf" not in site.hits
+
+
+def test_unchanged_report_is_not_archived_again(client, site):
+    client.store.ttl = 0
+    first = client.lookup("Morgan Stanley")
+    second = client.lookup("Morgan Stanley")
+    assert first["sha256"] and "sha256" not in second
+    assert second["status"] == "downloaded"
+    assert site.hits == {"search": 2, "pdf": 2}
+
+
+def test_failed_search_is_an_error_and_not_cached(client, site):
+    client.api_base_url = site.url + "/gone"
+    assert client.lookup("Goldman Sachs")["status"] == "error"
+    assert client.store.get("Goldman Sachs") is None
+
+
+def test_firm_detail_is_cached(client, site):
+    detail = client.firm_detail(361)
+    assert detail["name"] == "GOLDMAN SACHS & CO. LLC"
+    assert client.firm_detail(361) == detail
+    assert client.firm_detail(999999) is None
+    assert site.hits == {"detail": 2}
@@ -0,0 +1,215 @@
+import os
+import sys
+import glob
+import json
+import time
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from diagnostics import current_job
+
+
+# Set FINRA_TRACE_DIR to have every process append its spans to <dir>/spans-<pid>.jsonl after each job
+TRACE_DIR = os.environ.get("FINRA_TRACE_DIR")
+MAX_SPANS = int(os.environ.get("FINRA_TRACE_MAX_SPANS", "50000"))
+
+SPANS = deque(maxlen=MAX_SPANS)
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+class Span:
+    """One timed pipeline stage. end() records it; ending twice is a no-op"""
+
+    def __init__(self, name, attrs):
+        stack = _stack()
+        self.name = name
+        self.attrs = dict(attrs)
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        self.job_id = current_job()
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.ended = False
+        stack.append(self)
+
+    def set(self, **attrs):
+        self.attrs.update({k: v for k, v in attrs.items() if v is not None})
+        return self
+
+    def end(self, outcome="ok", **attrs):
+        if self.ended:
+            return
+        seconds = time.perf_counter() - self._t0
+        stack = _stack()
+        # Children left open (an early return or exception skipped their end) close with us
+        while self in stack:
+            child = stack[-1]
+            if child is self:
+                stack.pop()
+                break
+            child.end("abandoned")
+        self.ended = True
+        self.set(**attrs)
+        record = {
+            "name": self.name,
+            "job_id": self.job_id,
+            "outcome": outcome,
+            "start": round(self.started, 6),
+            "seconds": round(seconds, 6),
+            "parent": self.parent,
+            "depth": self.depth,
+            "pid": os.getpid(),
+            "thread": threading.get_ident(),
+            "attrs": self.attrs,
+        }
+        with _lock:
+            SPANS.append(record)
+
+
+def start_span(name, **attrs):
+    return Span(name, attrs)
+
+
+def annotate(**attrs):
+    """Attach attributes (winning selector, method, ...) to this thread's innermost open span"""
+    stack = _stack()
+    if stack:
+        stack[-1].set(**attrs)
+
+
+@contextmanager
+def span(name, **attrs):
+    """with span("results_wait") as s: ... -- outcome "ok" unless s.outcome is set or it raises"""
+    s = Span(name, attrs)
+    s.outcome = "ok"
+    try:
+        yield s
+    except BaseException as e:
+        s.end("error", error=f"{type(e).__name__}: {e}")
+        raise
+    s.end(s.outcome)
+
+
+def traced(name):
+    """Decorator: time the call as a span; a falsy return value counts as "failed\""""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            s = Span(name, {})
+            try:
+                value = func(*args, **kwargs)
+            except BaseException as e:
+                s.end("error", error=f"{type(e).__name__}: {e}")
+                raise
+            s.end("ok" if value else "failed")
+            return value
+        return wrapper
+    return decorator
+
+
+def take_spans():
+    """Remove and return everything recorded so far in this process"""
+    with _lock:
+        spans = list(SPANS)
+        SPANS.clear()
+    return spans
+
+
+def export_jsonl(path, spans):
+    with open(path, "a") as f:
+        for record in spans:
+            f.write(json.dumps(record) + "\n")
+
+
+def load_jsonl(paths):
+    spans = []
+    for path in paths:
+        with open(path) as f:
+            spans += [json.loads(line) for line in f if line.strip()]
+    return spans
+
+
+def chrome_trace(spans):
+    """Trace-event JSON for chrome://tracing / Perfetto: one complete ("X") event per span"""
+    events = []
+    for record in spans:
+        events.append({
+            "name": record["name"],
+            "cat": record["outcome"],
+            "ph": "X",
+            "ts": int(record["start"] * 1e6),
+            "dur": max(1, int(record["seconds"] * 1e6)),
+            "pid": record["pid"],
+            "tid": record["thread"],
+            "args": dict(record["attrs"], job_id=record["job_id"], outcome=record["outcome"]),
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path, spans):
+    with open(path, "w") as f:
+        json.dump(chrome_trace(spans), f)
+
+
+def flush(trace_dir=TRACE_DIR):
+    """Append this process's spans to <trace_dir>/spans-<pid>.jsonl (no-op unless tracing to disk)"""
+    if not trace_dir:
+        return None
+    spans = take_spans()
+    if not spans:
+        return None
+    os.makedirs(trace_dir, exist_ok=True)
+    path = os.path.join(trace_dir, f"spans-{os.getpid()}.jsonl")
+    export_jsonl(path, spans)
+    return path
+
+
+def summarize(spans):
+    """Per-stage count, failures and total/mean/p90 seconds, hottest stage first"""
+    by_name = {}
+    for record in spans:
+        by_name.setdefault(record["name"], []).append(record)
+    rows = []
+    for name, records in by_name.items():
+        seconds = sorted(r["seconds"] for r in records)
+        rows.append({
+            "name": name,
+            "count": len(records),
+            "failed": sum(1 for r in records if r["outcome"] != "ok"),
+            "total": round(sum(seconds), 3),
+            "mean": round(sum(seconds) / len(seconds), 3),
+            "p90": round(seconds[min(len(seconds) - 1, int(len(seconds) * 0.9))], 3),
+        })
+    return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+
+if __name__ == "__main__":
+    # python tracing.py <trace dir or spans-*.jsonl>... [-o trace.json]
+    args = sys.argv[1:]
+    output = None
+    if "-o" in args:
+        i = args.index("-o")
+        output = args[i + 1]
+        args = args[:i] + args[i + 2:]
+    if not args:
+        print("Usage: python tracing.py <trace dir or spans .jsonl>... [-o chrome_trace.json]")
+        sys.exit(1)
+    files = []
+    for arg in args:
+        files += sorted(glob.glob(os.path.join(arg, "spans-*.jsonl"))) if os.path.isdir(arg) else [arg]
+    all_spans = load_jsonl(files)
+    print(f"{'stage':<24}{'count':>7}{'failed':>8}{'total s':>10}{'mean s':>9}{'p90 s':>9}")
+    for row in summarize(all_spans):
+        print(f"{row['name']:<24}{row['count']:>7}{row['failed']:>8}{row['total']:>10.3f}{row['mean']:>9.3f}{row['p90']:>9.3f}")
+    if output:
+        export_chrome_trace(output, all_spans)
+        print(f"Chrome trace written to {output} (open in chrome://tracing or ui.perfetto.dev)")
@@ -0,0 +1,181 @@
+import time
+import threading
+from collections import deque
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException
+
+from log import debug_print
+
+
+# Every wait_until() call appends {"label", "seconds", "ok"} to its thread's log,
+# so concurrent lookups in one process each see only their own waits
+WAIT_LOG_SIZE = 500
+
+_local = threading.local()
+
+
+def wait_log():
+    """This thread's waits since the last reset_wait_log(), oldest first (at most WAIT_LOG_SIZE)"""
+    if not hasattr(_local, "log"):
+        _local.log = deque(maxlen=WAIT_LOG_SIZE)
+    return _local.log
+
+
+def reset_wait_log():
+    """Start a fresh wait log for the job about to run on this thread"""
+    _local.log = deque(maxlen=WAIT_LOG_SIZE)
+
+
+def record_wait(label, seconds, ok):
+    wait_log().append({"label": label, "seconds": round(seconds, 3), "ok": ok})
+
+
+# Counts in-flight XHR/fetch requests in window.__pendingRequests.
+# Installed with Page.addScriptToEvaluateOnNewDocument so it survives navigations.
+REQUEST_TRACKER_JS = """
+(function() {
+    if (window.__pendingRequests !== undefined) return;
+    window.__pendingRequests = 0;
+    var done = function() { window.__pendingRequests = Math.max(0, window.__pendingRequests - 1); };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        window.__pendingRequests++;
+        this.addEventListener('loadend', done);
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function() {
+            window.__pendingRequests++;
+            return fetch.apply(this, arguments).finally(done);
+        };
+    }
+})();
+"""
+
+
+def install_request_tracker(driver):
+    """Install the pending-request counter on every page this driver loads"""
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": REQUEST_TRACKER_JS})
+
+
+def wait_until(driver, condition, timeout=10, label=None, poll=0.1):
+    """Poll condition(driver) until it is truthy; returns its value, or False on timeout.
+
+    The time actually spent is recorded in this thread's wait log.
+    """
+    label = label or getattr(condition, "__name__", "condition")
+    start = time.perf_counter()
+    try:
+        value = WebDriverWait(driver, timeout, poll_frequency=poll,
+                              ignored_exceptions=(StaleElementReferenceException,)).until(condition)
+        ok = True
+    except TimeoutException:
+        value = False
+        ok = False
+    elapsed = time.perf_counter() - start
+    record_wait(label, elapsed, ok)
+    status = "ready" if ok else "timed out"
+    debug_print(f"⏱️ wait '{label}' {status} after {elapsed:.2f}s", "DEBUG")
+    return value
+
+
+def total_wait_time():
+    """Seconds spent in the waits recorded on this thread since reset_wait_log()"""
+    return round(sum(w["seconds"] for w in wait_log()), 3)
+
+
+# ---------- Conditions ----------
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def angular_stable(driver):
+    """True when every Angular app on the page reports its zone as stable (or there is no Angular)"""
+    return driver.execute_script("""
+        if (!window.getAllAngularTestabilities) return true;
+        return window.getAllAngularTestabilities().every(function(t) { return t.isStable(); });
+    """)
+
+
+def no_pending_requests(driver):
+    """True when the request tracker sees no XHR/fetch in flight"""
+    return driver.execute_script("return !window.__pendingRequests;")
+
+
+def page_settled(driver):
+    """Document loaded, Angular zone stable and no pending XHR/fetch"""
+    return driver.execute_script("""
+        if (document.readyState !== 'complete') return false;
+        if (window.__pendingRequests) return false;
+        if (window.getAllAngularTestabilities &&
+            !window.getAllAngularTestabilities().every(function(t) { return t.isStable(); })) return false;
+        return true;
+    """)
+
+
+def element_visible_and_stable(element):
+    """Element is displayed and its bounding box didn't move since the previous poll"""
+    last = {}
+
+    def condition(driver):
+        try:
+            if not element.is_displayed():
+                return False
+            rect = element.rect
+        except WebDriverException:
+            return False
+        stable = last.get("rect") == rect
+        last["rect"] = rect
+        return element if stable else False
+
+    condition.__name__ = "element_visible_and_stable"
+    return condition
+
+
+def new_window_handle(initial_handles):
+    """Returns the first window handle that was not in initial_handles"""
+    initial = set(initial_handles)
+
+    def condition(driver):
+        for handle in driver.window_handles:
+            if handle not in initial:
+                return handle
+        return False
+
+    condition.__name__ = "new_window_handle"
+    return condition
+
+
+def url_changed(old_url):
+    def condition(driver):
+        return driver.current_url != old_url
+
+    condition.__name__ = "url_changed"
+    return condition
+
+
+def any_element_present(locators):
+    """Returns (selector, element) for the first of [(by, selector), ...] present in the DOM"""
+    def condition(driver):
+        for by, selector in locators:
+            elements = driver.find_elements(by, selector)
+            if elements:
+                return selector, elements[0]
+        return False
+
+    condition.__name__ = "any_element_present"
+    return condition
+
+
+def element_gone(element):
+    """Element was removed from the DOM or hidden"""
+    def condition(driver):
+        try:
+            return not element.is_displayed()
+        except (StaleElementReferenceException, WebDriverException):
+            return True
+
+    condition.__name__ = "element_gone"
+    return condition